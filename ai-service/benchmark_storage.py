@@ -0,0 +1,156 @@
+"""
+Benchmark for compact (int8) embedding storage vs the float32 path
+Run: python benchmark_storage.py [--chunks 20000] [--queries 200] [--top-k 3]
+
+Uses synthetic clustered 384-dim vectors (the all-MiniLM-L6-v2 size) so no model
+download is needed. Reports memory per million chunks (vectors, chunk text and
+the quiz term index) and recall@k of the int8 search, with and without the exact
+re-rank against the memory-mapped float32 vectors, against float32 cosine search.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from services.compact_storage import pack_chunks, quantize_int8, search_int8, write_full_precision
+from services.term_index import TermIndex
+
+EMBEDDING_DIM = 384
+
+
+def make_dataset(n_chunks, chunk_words, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, n_chunks // 50), EMBEDDING_DIM)).astype(np.float32)
+    assignments = rng.integers(0, len(centers), size=n_chunks)
+    embeddings = centers[assignments] + 0.5 * rng.normal(size=(n_chunks, EMBEDDING_DIM)).astype(np.float32)
+
+    vocabulary = ["lecture", "concept", "network", "energy", "model", "theory", "cell", "data",
+                  "Mitochondria", "Equilibrium", "Photosynthesis", "Algorithm", "Gradient", "Protocol"]
+    chunks = [
+        " ".join(
+            vocabulary[(i * 7 + j) % len(vocabulary)] + ("." if j % 12 == 11 else "")
+            for j in range(chunk_words)
+        )
+        for i in range(n_chunks)
+    ]
+    return embeddings, chunks
+
+
+class RandomEncoder:
+    """Stands in for the sentence encoder when building term indexes."""
+
+    def encode(self, texts, batch_size=32):
+        rng = np.random.default_rng(len(texts))
+        return rng.normal(size=(len(texts), EMBEDDING_DIM)).astype(np.float32)
+
+
+def text_bytes(chunk_text, offsets):
+    """Packed chunk text, stored once per material in both modes"""
+    return sys.getsizeof(chunk_text) + offsets.nbytes
+
+
+def term_index_bytes(index):
+    """Index arrays plus the vocabulary; the chunk text itself is shared with storage"""
+    arrays = (index.spans, index.term_offsets, index.sentence_term_ids,
+              index.neighbours)
+    vocabulary = sys.getsizeof(index.terms) + sys.getsizeof(index.term_ids)
+    vocabulary += sum(sys.getsizeof(term) for term in index.terms)
+    return sum(array.nbytes for array in arrays) + vocabulary
+
+
+def sentence_list_bytes(index):
+    """The same sentences and key terms held as Python lists of strings"""
+    sentences = [index.sentence(i) for i in range(len(index))]
+    terms = [index.sentence_terms(i) for i in range(len(index))]
+    total = sys.getsizeof(sentences) + sum(sys.getsizeof(sentence) for sentence in sentences)
+    total += sys.getsizeof(terms) + sum(sys.getsizeof(row) for row in terms)
+    return total
+
+
+def float32_search(embeddings, query, top_k):
+    """Mirrors VectorStore.retrieve in float32 mode"""
+    query_norm = query / np.linalg.norm(query)
+    embeddings_norm = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    similarities = np.dot(embeddings_norm, query_norm)
+    return np.argsort(similarities)[-top_k:][::-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--chunk-words", type=int, default=500)
+    parser.add_argument("--index-chunks", type=int, default=1000, help="chunks sampled to size the term index")
+    parser.add_argument("--shortlist-factor", type=int, default=8)
+    args = parser.parse_args()
+
+    embeddings, chunks = make_dataset(args.chunks, args.chunk_words)
+    codes, scales = quantize_int8(embeddings)
+    chunk_text, offsets = pack_chunks(chunks)
+
+    scale = 1_000_000 / args.chunks
+    text_total = text_bytes(chunk_text, offsets)
+    float_total = embeddings.nbytes + text_total
+    int8_total = codes.nbytes + scales.nbytes + text_total
+
+    print("=" * 50)
+    print(f"Memory per million chunks ({args.chunk_words} words each)")
+    print("=" * 50)
+    print(f"float32 vectors:   {embeddings.nbytes * scale / 2**20:10.1f} MiB")
+    print(f"int8 codes+scales: {(codes.nbytes + scales.nbytes) * scale / 2**20:10.1f} MiB")
+    print(f"packed chunk text: {text_total * scale / 2**20:10.1f} MiB")
+    print(f"float32 total:     {float_total * scale / 2**20:10.1f} MiB")
+    print(f"int8 total:        {int8_total * scale / 2**20:10.1f} MiB")
+    print(f"re-rank file:      {embeddings.nbytes * scale / 2**20:10.1f} MiB on disk (memmap)")
+
+    sample = chunks[:args.index_chunks]
+    sample_text, sample_offsets = pack_chunks(sample)
+    term_index = TermIndex(sample_text, sample_offsets, RandomEncoder())
+    index_scale = 1_000_000 / len(sample)
+    print(f"term index:        {term_index_bytes(term_index) * index_scale / 2**20:10.1f} MiB "
+          f"({len(term_index)} sentences in {len(sample)} chunks)")
+    print(f"  as string lists: {sentence_list_bytes(term_index) * index_scale / 2**20:10.1f} MiB")
+
+    rng = np.random.default_rng(1)
+    query_rows = rng.integers(0, args.chunks, size=args.queries)
+    queries = embeddings[query_rows] + 0.3 * rng.normal(size=(args.queries, EMBEDDING_DIM)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as vectors_dir:
+        vectors = write_full_precision(embeddings, os.path.join(vectors_dir, "vectors.f32"))
+
+        hits = {"int8": 0, "int8 + re-rank": 0}
+        times = {"float32": 0.0, "int8": 0.0, "int8 + re-rank": 0.0}
+        for query in queries:
+            started = time.perf_counter()
+            expected = set(float32_search(embeddings, query, args.top_k).tolist())
+            times["float32"] += time.perf_counter() - started
+
+            started = time.perf_counter()
+            found = search_int8(codes, scales, query, args.top_k)
+            times["int8"] += time.perf_counter() - started
+            hits["int8"] += len(expected & set(found.tolist()))
+
+            started = time.perf_counter()
+            found = search_int8(
+                codes, scales, query, args.top_k, args.shortlist_factor,
+                rerank=lambda rows: vectors[rows],
+            )
+            times["int8 + re-rank"] += time.perf_counter() - started
+            hits["int8 + re-rank"] += len(expected & set(found.tolist()))
+
+    print("\n" + "=" * 50)
+    print(f"Search over {args.chunks} chunks, {args.queries} queries")
+    print("=" * 50)
+    for name, count in hits.items():
+        print(f"recall@{args.top_k} {name + ':':16}{count / (args.queries * args.top_k):.4f}")
+    for name, seconds in times.items():
+        print(f"avg latency {name + ':':16}{seconds / args.queries * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Load-test scenario for the model scheduler: an ingest storm vs interactive chat
+Run: python loadtest_scheduler.py [--lectures 30] [--batches 10] [--qps 20] [--http-lectures 60]
+
+One teacher uploads many lectures at once while students keep asking questions.
+Model calls are simulated with fixed-duration sleeps on a single model worker, so
+the numbers reflect queuing only. The same workload runs against:
+
+  fifo        - every call goes to one FIFO executor, each ingest as one encode call
+  scheduler   - ModelScheduler with bulk ingests split into fair-queued batches
+  http sync   - the scheduler behind uvicorn with sync handlers (the old main.py shape),
+                sent more concurrent ingests than the 40-thread request threadpool
+  http async  - the same with async handlers awaiting the scheduler (the main.py shape)
+
+Interactive p50/p99 latency should stay near the single-call cost with the
+scheduler, while FIFO latency grows with the ingest backlog. Over HTTP, sync
+handlers hold a threadpool thread while their batches wait in the scheduler, so
+chat waits for a thread behind the ingests; async handlers hold none.
+"""
+
+import argparse
+import json
+import socket
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import uvicorn
+from fastapi import FastAPI, Request
+from pydantic import BaseModel
+
+from prepease_shared.scheduler import BULK, INTERACTIVE, ModelScheduler, tenant_of
+
+
+def model_call(seconds):
+    time.sleep(seconds)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_batch(batch):
+    for seconds in batch:
+        model_call(seconds)
+
+
+class IngestLoad(BaseModel):
+    batches: List[float]
+
+
+class QueryLoad(BaseModel):
+    seconds: float
+
+
+def make_app(scheduler, use_async):
+    """
+    Minimal service with /ingest and /chat handlers shaped like main.py's
+    """
+    app = FastAPI()
+
+    if use_async:
+        @app.post("/ingest")
+        async def ingest(payload: IngestLoad, request: Request) -> dict:
+            with scheduler.admit(tenant_of(request), BULK):
+                await scheduler.map_batches_async(run_batch, payload.batches, 1)
+            return {"status": "stored"}
+
+        @app.post("/chat")
+        async def chat(payload: QueryLoad, request: Request) -> dict:
+            with scheduler.admit(tenant_of(request), INTERACTIVE):
+                await scheduler.run_async(model_call, payload.seconds)
+            return {"answer": ""}
+    else:
+        @app.post("/ingest")
+        def ingest(payload: IngestLoad, request: Request) -> dict:
+            with scheduler.admit(tenant_of(request), BULK):
+                scheduler.map_batches(run_batch, payload.batches, 1)
+            return {"status": "stored"}
+
+        @app.post("/chat")
+        def chat(payload: QueryLoad, request: Request) -> dict:
+            with scheduler.admit(tenant_of(request), INTERACTIVE):
+                scheduler.run(model_call, payload.seconds)
+            return {"answer": ""}
+
+    return app
+
+
+def post(url, tenant, body):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json", "X-Tenant-Id": tenant},
+    )
+    with urllib.request.urlopen(request, timeout=300) as response:
+        response.read()
+
+
+def run_http_scenario(name, use_async, args):
+    scheduler = ModelScheduler(
+        workers=1,
+        rates={INTERACTIVE: (10.0, 30.0), BULK: (float(args.http_lectures), float(args.http_lectures))},
+    )
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    base_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+    server = uvicorn.Server(uvicorn.Config(make_app(scheduler, use_async), log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    run_scenario(
+        name,
+        lambda tenant, batches: post(f"{base_url}/ingest", tenant, {"batches": batches}),
+        lambda tenant, seconds: post(f"{base_url}/chat", tenant, {"seconds": seconds}),
+        args,
+        lectures=args.http_lectures,
+    )
+
+    server.should_exit = True
+    thread.join()
+
+
+def run_scenario(name, ingest, query, args, lectures=None):
+    latencies = []
+    latencies_lock = threading.Lock()
+
+    def ingest_lecture(lecture):
+        ingest("teacher-1", [args.batch_ms / 1000] * args.batches)
+
+    def ask(student):
+        started = time.perf_counter()
+        query(f"student-{student}", args.query_ms / 1000)
+        with latencies_lock:
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    lectures = lectures or args.lectures
+    ingest_threads = [threading.Thread(target=ingest_lecture, args=(i,)) for i in range(lectures)]
+    for thread in ingest_threads:
+        thread.start()
+
+    query_threads = []
+    duration = lectures * args.batches * args.batch_ms / 1000
+    for i in range(int(duration * args.qps)):
+        thread = threading.Thread(target=ask, args=(i % args.students,))
+        thread.start()
+        query_threads.append(thread)
+        time.sleep(1 / args.qps)
+
+    for thread in query_threads:
+        thread.join()
+    interactive_done = time.perf_counter() - started
+    for thread in ingest_threads:
+        thread.join()
+    ingest_done = time.perf_counter() - started
+
+    print(f"\n--- {name} ---")
+    print(f"interactive queries: {len(latencies)}")
+    print(f"interactive p50:     {percentile(latencies, 50):8.1f} ms")
+    print(f"interactive p99:     {percentile(latencies, 99):8.1f} ms")
+    print(f"interactive max:     {max(latencies):8.1f} ms")
+    print(f"queries finished:    {interactive_done:8.2f} s")
+    print(f"ingest finished:     {ingest_done:8.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lectures", type=int, default=30)
+    parser.add_argument("--batches", type=int, default=10, help="encode batches per lecture")
+    parser.add_argument("--batch-ms", type=float, default=10.0)
+    parser.add_argument("--query-ms", type=float, default=5.0)
+    parser.add_argument("--qps", type=float, default=20.0)
+    parser.add_argument("--students", type=int, default=20)
+    parser.add_argument("--http-lectures", type=int, default=60,
+                        help="concurrent ingests in the HTTP scenarios (more than the 40 request threads)")
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("Model Scheduler Load Test")
+    print("=" * 50)
+    print(f"{args.lectures} lectures x {args.batches} batches x {args.batch_ms} ms, "
+          f"{args.qps} queries/s x {args.query_ms} ms")
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    run_scenario(
+        "fifo",
+        lambda tenant, batches: executor.submit(lambda: [model_call(b) for b in batches]).result(),
+        lambda tenant, seconds: executor.submit(model_call, seconds).result(),
+        args,
+    )
+    executor.shutdown()
+
+    scheduler = ModelScheduler(
+        workers=1,
+        rates={INTERACTIVE: (10.0, 30.0), BULK: (float(args.lectures), float(args.lectures))},
+    )
+
+    def scheduled_ingest(tenant, batches):
+        with scheduler.admit(tenant, BULK):
+            scheduler.map_batches(lambda batch: [model_call(b) for b in batch], batches, 1)
+
+    def scheduled_query(tenant, seconds):
+        with scheduler.admit(tenant, INTERACTIVE):
+            scheduler.run(model_call, seconds)
+
+    run_scenario("scheduler", scheduled_ingest, scheduled_query, args)
+    print(f"\nscheduler stats: {scheduler.stats()}")
+
+    run_http_scenario("http sync", False, args)
+    run_http_scenario("http async", True, args)
+
+
+if __name__ == "__main__":
+    main()
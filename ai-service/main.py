@@ -1,13 +1,18 @@
+import math
 import os
-from fastapi import FastAPI, HTTPException
+from contextlib import contextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 from typing import List, Optional
 
+from prepease_shared.scheduler import BULK, INTERACTIVE, ModelScheduler, RateLimitedError, SchedulerError, tenant_of
 from services.extractor import extract_text
 from services.vector_store import VectorStore
 from services.qa_service import QAService
 from services.quiz_generator import QuizGenerator
+from services.profiler import RequestProfiler, attach_worker
 
 
 class MaterialRequest(BaseModel):
@@ -30,6 +35,19 @@ class QuizRequest(BaseModel):
     questionCount: int
 
 
+class CollectionRequest(BaseModel):
+    materialIds: List[str]
+
+
+class CollectionChatRequest(BaseModel):
+    question: str
+
+
+class CollectionQuizRequest(BaseModel):
+    difficulty: str
+    questionCount: int
+
+
 app = FastAPI(title="PrepEase AI Service")
 
 app.add_middleware(
@@ -40,9 +58,63 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-vector_store = VectorStore()
+scheduler = ModelScheduler(
+    workers=int(os.getenv("MODEL_WORKERS", "1")),
+    rates={
+        INTERACTIVE: (float(os.getenv("INTERACTIVE_RATE", "10")), float(os.getenv("INTERACTIVE_BURST", "30"))),
+        BULK: (float(os.getenv("BULK_RATE", "2")), float(os.getenv("BULK_BURST", "60"))),
+    },
+    job_hooks=[attach_worker],
+)
+vector_store = VectorStore(
+    storage_mode=os.getenv("VECTOR_STORAGE", "float32"),
+    scheduler=scheduler,
+    vectors_dir=os.getenv("VECTOR_RERANK_DIR") or None,
+)
 qa_service = QAService(vector_store)
 quiz_generator = QuizGenerator(vector_store)
+profiler = RequestProfiler(
+    sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+    ring_size=int(os.getenv("PROFILE_RING_SIZE", "20")),
+    interval_ms=float(os.getenv("PROFILE_INTERVAL_MS", "5")),
+)
+
+
+@app.exception_handler(SchedulerError)
+def scheduler_error_handler(request: Request, exc: SchedulerError) -> JSONResponse:
+    if isinstance(exc, RateLimitedError):
+        return JSONResponse(
+            status_code=429,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(math.ceil(exc.retry_after))},
+        )
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+
+def _profiling_enabled(request: Request) -> bool:
+    flag = request.headers.get("X-Profile") or request.query_params.get("profile")
+    return profiler.should_profile(flag)
+
+
+@contextmanager
+def _profiled(request: Request, endpoint: str):
+    """
+    Profile the handler body if requested; the id is kept on the request state so
+    the response header is set even when the handler fails. Only the scheduler
+    workers running the request's jobs are sampled, not the event loop.
+    """
+    with profiler.profile(endpoint, _profiling_enabled(request), sample_caller=False) as profile_id:
+        request.state.profile_id = profile_id
+        yield
+
+
+@app.middleware("http")
+async def add_profile_header(request: Request, call_next):
+    response = await call_next(request)
+    profile_id = getattr(request.state, "profile_id", None)
+    if profile_id:
+        response.headers["X-Profile-Id"] = profile_id
+    return response
 
 
 @app.get("/health")
@@ -50,6 +122,11 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/scheduler/stats")
+def scheduler_stats() -> dict:
+    return scheduler.stats()
+
+
 @app.post("/process-material")
 def process_material(payload: MaterialRequest) -> dict:
     file_path = payload.filePath
@@ -71,35 +148,123 @@ def process_material(payload: MaterialRequest) -> dict:
 
 
 @app.post("/ingest")
-def ingest_material(payload: IngestRequest) -> dict:
+async def ingest_material(payload: IngestRequest, request: Request) -> dict:
     try:
-        vector_store.ingest(payload.materialId, payload.extractedText)
+        with scheduler.admit(tenant_of(request), BULK):
+            await vector_store.ingest_async(payload.materialId, payload.extractedText)
         return {"status": "stored"}
+    except SchedulerError:
+        raise
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Ingestion failed: {str(exc)}") from exc
 
 
 @app.post("/chat")
-def chat(payload: ChatRequest) -> dict:
+async def chat(payload: ChatRequest, request: Request) -> dict:
     try:
-        answer = qa_service.answer_question(payload.materialId, payload.question)
+        with scheduler.admit(tenant_of(request), INTERACTIVE), _profiled(request, "/chat"):
+            answer = await scheduler.run_async(qa_service.answer_question, payload.materialId, payload.question)
         return {"answer": answer}
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except SchedulerError:
+        raise
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Chat failed: {str(exc)}") from exc
 
 
 @app.post("/generate-quiz")
-def generate_quiz(payload: QuizRequest) -> dict:
+async def generate_quiz(payload: QuizRequest, request: Request) -> dict:
     try:
-        questions = quiz_generator.generate_quiz(
-            payload.materialId,
-            payload.difficulty,
-            payload.questionCount
-        )
+        with scheduler.admit(tenant_of(request), INTERACTIVE), _profiled(request, "/generate-quiz"):
+            questions = await scheduler.run_async(
+                quiz_generator.generate_quiz,
+                payload.materialId,
+                payload.difficulty,
+                payload.questionCount
+            )
+        return {"questions": questions}
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except SchedulerError:
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Quiz generation failed: {str(exc)}") from exc
+
+
+@app.put("/collections/{collection_id}")
+def add_collection_materials(collection_id: str, payload: CollectionRequest) -> dict:
+    vector_store.add_to_collection(collection_id, payload.materialIds)
+    return {"status": "stored", "collectionId": collection_id}
+
+
+@app.delete("/collections/{collection_id}/materials/{material_id}")
+def remove_collection_material(collection_id: str, material_id: str) -> dict:
+    try:
+        vector_store.remove_from_collection(collection_id, material_id)
+        return {"status": "removed"}
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@app.delete("/collections/{collection_id}")
+def delete_collection(collection_id: str) -> dict:
+    try:
+        vector_store.delete_collection(collection_id)
+        return {"status": "deleted"}
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@app.post("/collections/{collection_id}/chat")
+async def collection_chat(collection_id: str, payload: CollectionChatRequest, request: Request) -> dict:
+    try:
+        with scheduler.admit(tenant_of(request), INTERACTIVE), _profiled(request, "/collections/chat"):
+            answer = await scheduler.run_async(qa_service.answer_collection_question, collection_id, payload.question)
+        return {"answer": answer}
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except SchedulerError:
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Chat failed: {str(exc)}") from exc
+
+
+@app.post("/collections/{collection_id}/generate-quiz")
+async def generate_collection_quiz(collection_id: str, payload: CollectionQuizRequest, request: Request) -> dict:
+    try:
+        with scheduler.admit(tenant_of(request), INTERACTIVE), _profiled(request, "/collections/generate-quiz"):
+            questions = await scheduler.run_async(
+                quiz_generator.generate_collection_quiz,
+                collection_id,
+                payload.difficulty,
+                payload.questionCount
+            )
         return {"questions": questions}
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except SchedulerError:
+        raise
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Quiz generation failed: {str(exc)}") from exc
+
+
+@app.get("/profiles")
+def list_profiles() -> dict:
+    return {"profiles": profiler.list_profiles()}
+
+
+@app.get("/profiles/{profile_id}/collapsed", response_class=PlainTextResponse)
+def download_collapsed_profile(profile_id: str) -> str:
+    try:
+        return profiler.to_collapsed(profile_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@app.get("/profiles/{profile_id}/speedscope")
+def download_speedscope_profile(profile_id: str) -> dict:
+    try:
+        return profiler.to_speedscope(profile_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
@@ -0,0 +1,88 @@
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+
+
+SEARCH_BLOCK_ROWS = 1024
+
+
+def quantize_int8(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Normalize embeddings and scalar-quantize each row to int8 with its own scale.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    scales = np.abs(normalized).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.round(normalized / scales[:, None]).astype(np.int8)
+
+    return codes, scales.astype(np.float32)
+
+
+def write_full_precision(embeddings: np.ndarray, path: str) -> np.memmap:
+    """
+    Write normalized float32 vectors to a file and return a read-only memmap.
+    Only the rows a re-rank touches are paged in, so they stay off the heap.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    vectors = np.memmap(path, dtype=np.float32, mode="w+", shape=normalized.shape)
+    vectors[:] = normalized
+    vectors.flush()
+    del vectors
+
+    return np.memmap(path, dtype=np.float32, mode="r", shape=normalized.shape)
+
+
+def pack_chunks(chunks: List[str]) -> Tuple[str, np.ndarray]:
+    """
+    Store chunk texts as one contiguous string plus an offsets array.
+    """
+    offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(chunk) for chunk in chunks])
+    return "".join(chunks), offsets
+
+
+def unpack_chunk(text: str, offsets: np.ndarray, index: int) -> str:
+    return text[offsets[index]:offsets[index + 1]]
+
+
+def search_int8(
+    codes: np.ndarray,
+    scales: np.ndarray,
+    query_vec: np.ndarray,
+    top_k: int,
+    shortlist_factor: int = 8,
+    rerank: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+) -> np.ndarray:
+    """
+    Two-stage cosine search over int8 codes.
+
+    The coarse pass scores the full-precision query against every int8 row in
+    bounded blocks (per-row scales applied afterwards). If `rerank` is given it
+    returns the normalized full-precision vectors for a set of rows, and the top
+    top_k * shortlist_factor rows are re-scored exactly against them; otherwise
+    the coarse ranking is returned. Returns row indices, best first.
+    """
+    query_norm = np.asarray(query_vec, dtype=np.float32)
+    query_norm = query_norm / np.linalg.norm(query_norm)
+
+    coarse = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), SEARCH_BLOCK_ROWS):
+        block = codes[start:start + SEARCH_BLOCK_ROWS].astype(np.float32)
+        coarse[start:start + len(block)] = block @ query_norm
+    coarse *= scales
+
+    top_k = min(top_k, len(codes))
+    if rerank is None:
+        top = np.argpartition(coarse, -top_k)[-top_k:]
+        return top[np.argsort(coarse[top])[::-1]]
+
+    shortlist_size = min(len(codes), top_k * shortlist_factor)
+    shortlist = np.sort(np.argpartition(coarse, -shortlist_size)[-shortlist_size:])
+
+    exact = np.asarray(rerank(shortlist), dtype=np.float32) @ query_norm
+    order = np.argsort(exact)[::-1][:top_k]
+
+    return shortlist[order]
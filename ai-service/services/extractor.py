@@ -1,11 +1,35 @@
+import hashlib
+import multiprocessing
 import os
-from typing import Literal
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Literal, Tuple
 
 import fitz
 from pptx import Presentation
+from pptx.shapes.group import GroupShape
 
 FileType = Literal["pdf", "pptx"]
 
+PAGE_CACHE_SIZE = 4096
+# Pool workers reopen the document. That is cheap for PDFs (pages load lazily)
+# but each worker re-parses the whole deck for PPTX, so decks need far more
+# changed slides before fanning out pays off.
+PARALLEL_MIN_PAGES = 40
+PARALLEL_MIN_SLIDES = 200
+MAX_WORKERS = os.cpu_count() or 1
+
+PageKey = Tuple[str, str]
+
+# file path -> {mtime, size, sha256, page_keys}
+_file_cache: Dict[str, Dict] = {}
+# (file path, page/slide content hash) -> extracted text
+_page_cache: "OrderedDict[PageKey, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
 
 def _detect_file_type(file_path: str) -> FileType:
     ext = os.path.splitext(file_path)[1].lower()
@@ -17,20 +41,210 @@ def _detect_file_type(file_path: str) -> FileType:
 
 
 def extract_text(file_path: str) -> str:
+    """
+    Extract text from a PDF or PPTX, reusing cached pages/slides.
+
+    Unchanged files (same mtime and size, or same content hash) are served
+    without re-parsing. Otherwise only pages whose content hash is not cached
+    are extracted, in parallel across a process pool for large documents.
+    """
     file_type = _detect_file_type(file_path)
+    stat = os.stat(file_path)
+
+    with _cache_lock:
+        entry = _file_cache.get(file_path)
+        if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            cached = _cached_pages(entry["page_keys"])
+            if cached is not None:
+                return _join_pages(cached)
+
+    sha256 = _hash_file(file_path)
+
+    with _cache_lock:
+        if entry and entry["sha256"] == sha256:
+            cached = _cached_pages(entry["page_keys"])
+            if cached is not None:
+                entry["mtime"] = stat.st_mtime
+                entry["size"] = stat.st_size
+                return _join_pages(cached)
+
+    if file_type == "pdf":
+        with fitz.open(file_path) as doc:
+            page_keys = [(file_path, _pdf_page_digest(doc, page)) for page in doc]
+            texts = _fill_pages(
+                file_path, file_type, page_keys,
+                lambda i: doc[i].get_text(), PARALLEL_MIN_PAGES,
+            )
+    else:
+        slides = Presentation(file_path).slides
+        page_keys = [(file_path, _slide_digest(slide)) for slide in slides]
+        texts = _fill_pages(
+            file_path, file_type, page_keys,
+            lambda i: _extract_slide(slides[i]), PARALLEL_MIN_SLIDES,
+        )
+
+    with _cache_lock:
+        _file_cache[file_path] = {
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "sha256": sha256,
+            "page_keys": page_keys,
+        }
+
+    return _join_pages(texts)
+
+
+def _join_pages(texts: List[str]) -> str:
+    return "\n".join(texts).strip()
+
+
+def _cached_pages(page_keys: List[str]):
+    """
+    Return cached texts for every page key, or None if any page was evicted.
+    """
+    if any(key not in _page_cache for key in page_keys):
+        return None
+    for key in page_keys:
+        _page_cache.move_to_end(key)
+    return [_page_cache[key] for key in page_keys]
+
+
+def _hash_file(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _fill_pages(
+    file_path: str,
+    file_type: FileType,
+    page_keys: List[PageKey],
+    extract_page: Callable[[int], str],
+    parallel_min: int,
+) -> List[str]:
+    """
+    Return the text of every page, extracting only pages missing from the cache.
+    Missing pages are extracted from the already-open document unless there are
+    enough of them to justify a process pool.
+    """
+    with _cache_lock:
+        texts = [_page_cache.get(key) for key in page_keys]
+    missing = [i for i, text in enumerate(texts) if text is None]
+
+    if len(missing) >= parallel_min and MAX_WORKERS > 1:
+        extracted = _extract_pages_parallel(file_path, file_type, missing)
+    else:
+        extracted = [extract_page(i) for i in missing]
+
+    with _cache_lock:
+        for index, text in zip(missing, extracted):
+            texts[index] = text
+            _page_cache[page_keys[index]] = text
+        for key in page_keys:
+            if key in _page_cache:
+                _page_cache.move_to_end(key)
+        while len(_page_cache) > PAGE_CACHE_SIZE:
+            _page_cache.popitem(last=False)
+
+    return texts
+
+
+def _pdf_page_digest(doc, page) -> str:
+    """
+    Hash a page's content stream together with the resources it draws from.
+
+    Pages that only paint a form XObject (e.g. "q /fzFrm0 Do Q") share the same
+    content stream across files, so the XObject streams and the fonts, including
+    their ToUnicode maps, are part of the key.
+    """
+    digest = hashlib.sha256(page.read_contents())
+
+    for xref, *_ in page.get_xobjects():
+        _hash_xref(doc, xref, digest)
+    for xref, *_ in page.get_fonts(full=True):
+        _hash_xref(doc, xref, digest)
+        kind, value = doc.xref_get_key(xref, "ToUnicode")
+        if kind == "xref":
+            _hash_xref(doc, int(value.split()[0]), digest)
+
+    return digest.hexdigest()
+
+
+def _hash_xref(doc, xref: int, digest) -> None:
+    if xref <= 0:
+        return
+    digest.update(doc.xref_object(xref, compressed=True).encode())
+    if doc.xref_is_stream(xref):
+        digest.update(doc.xref_stream_raw(xref))
+
+
+def _slide_digest(slide) -> str:
+    digest = hashlib.sha256(slide.part.blob)
+    if slide.has_notes_slide:
+        digest.update(slide.notes_slide.part.blob)
+    return digest.hexdigest()
+
+
+def _extract_pages_parallel(file_path: str, file_type: FileType, indices: List[int]) -> List[str]:
+    """
+    Extract the given pages across worker processes.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    batch_size = -(-len(indices) // MAX_WORKERS)
+    batches = [indices[i:i + batch_size] for i in range(0, len(indices), batch_size)]
+    futures = [_executor.submit(_extract_pages, file_path, file_type, batch) for batch in batches]
+
+    texts = []
+    for future in futures:
+        texts.extend(future.result())
+    return texts
+
+
+def _extract_pages(file_path: str, file_type: FileType, indices: List[int]) -> List[str]:
+    if not indices:
+        return []
 
     if file_type == "pdf":
-        text_parts = []
         with fitz.open(file_path) as doc:
-            for page in doc:
-                text_parts.append(page.get_text())
-        return "\n".join(text_parts).strip()
+            return [doc[i].get_text() for i in indices]
+
+    slides = Presentation(file_path).slides
+    return [_extract_slide(slides[i]) for i in indices]
+
+
+def _extract_slide(slide) -> str:
+    """
+    Collect text frames, table cells and speaker notes of a slide.
+    """
+    text_runs = _extract_shapes(slide.shapes)
+
+    if slide.has_notes_slide:
+        notes = slide.notes_slide.notes_text_frame
+        if notes is not None and notes.text.strip():
+            text_runs.append(notes.text)
+
+    return "\n".join(text_runs)
+
 
-    presentation = Presentation(file_path)
+def _extract_shapes(shapes) -> List[str]:
     text_runs = []
-    for slide in presentation.slides:
-        for shape in slide.shapes:
-            if not hasattr(shape, "text"):
-                continue
-            text_runs.append(shape.text)
-    return "\n".join(text_runs).strip()
+    for shape in shapes:
+        if isinstance(shape, GroupShape):
+            text_runs.extend(_extract_shapes(shape.shapes))
+        elif getattr(shape, "has_table", False):
+            for row in shape.table.rows:
+                cells = [cell.text for cell in row.cells if cell.text.strip()]
+                if cells:
+                    text_runs.append(" | ".join(cells))
+        elif shape.has_text_frame and shape.text_frame.text.strip():
+            text_runs.append(shape.text_frame.text)
+    return text_runs
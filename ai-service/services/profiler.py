@@ -0,0 +1,254 @@
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+
+COMPONENTS = {
+    "VectorStore": "vector_store.py",
+    "QAService": "qa_service.py",
+    "QuizGenerator": "quiz_generator.py",
+}
+
+
+class _StackSampler:
+    """
+    Samples the stacks of a set of threads: the request thread (unless None) plus
+    any worker threads attached while they run a job for the request. Each stack
+    is rooted at a "[thread name]" frame.
+    """
+
+    def __init__(self, thread_id: Optional[int], interval: float):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        # Ticks on which any sampled thread was inside each component
+        self.component_samples: Counter = Counter()
+        self._threads = {} if thread_id is None else {thread_id: threading.current_thread().name}
+        self._threads_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def attach(self, thread_id: int, name: str) -> None:
+        with self._threads_lock:
+            self._threads[thread_id] = name
+
+    def detach(self, thread_id: int) -> None:
+        with self._threads_lock:
+            self._threads.pop(thread_id, None)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._threads_lock:
+                threads = list(self._threads.items())
+
+            components = set()
+            for thread_id, name in threads:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(f"[{name}]")
+
+                self.samples[tuple(reversed(stack))] += 1
+                components.update(
+                    component for component, filename in COMPONENTS.items()
+                    if any(filename in entry for entry in stack)
+                )
+
+            self.component_samples.update(components)
+
+
+_active_sampler: ContextVar[Optional[_StackSampler]] = ContextVar("active_sampler", default=None)
+
+
+@contextmanager
+def attach_worker():
+    """
+    Scheduler job hook: while a job submitted from a profiled request runs,
+    sample the worker thread as part of that request's profile.
+    """
+    sampler = _active_sampler.get()
+    if sampler is None:
+        yield
+        return
+
+    thread_id = threading.get_ident()
+    sampler.attach(thread_id, threading.current_thread().name)
+    try:
+        yield
+    finally:
+        sampler.detach(thread_id)
+
+
+class RequestProfiler:
+    def __init__(self, sample_rate: float = 0.0, ring_size: int = 20, interval_ms: float = 5.0):
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000.0
+        self.profiles: deque = deque(maxlen=ring_size)
+        self._lock = threading.Lock()
+        self._active_traces = 0
+        self._owns_trace = False
+
+    def should_profile(self, flag: Optional[str]) -> bool:
+        """
+        Decide whether a request is profiled, either explicitly via flag or by sampling.
+        """
+        if flag is not None and flag.lower() in ("1", "true", "yes"):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    @contextmanager
+    def profile(self, endpoint: str, enabled: bool = True, sample_caller: bool = True):
+        """
+        Sample the calling thread's stack and track allocations while the block runs.
+        Scheduler workers running jobs for this block are sampled too (see attach_worker).
+        Async handlers pass sample_caller=False, since their thread is the shared event loop.
+        Yields the profile id; the finished profile is appended to the bounded ring.
+        """
+        if not enabled:
+            yield None
+            return
+
+        profile_id = uuid.uuid4().hex
+        self._start_tracing()
+        before = tracemalloc.take_snapshot()
+        sampler = _StackSampler(threading.get_ident() if sample_caller else None, self.interval)
+        started = time.perf_counter()
+        sampler.start()
+        sampler_token = _active_sampler.set(sampler)
+
+        try:
+            yield profile_id
+        finally:
+            _active_sampler.reset(sampler_token)
+            sampler.stop()
+            duration = time.perf_counter() - started
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            self._stop_tracing()
+
+            allocations = [
+                {
+                    "location": str(stat.traceback[0]),
+                    "sizeDiff": stat.size_diff,
+                    "countDiff": stat.count_diff,
+                }
+                for stat in after.compare_to(before, "lineno")[:10]
+            ]
+
+            with self._lock:
+                self.profiles.append({
+                    "id": profile_id,
+                    "endpoint": endpoint,
+                    "timestamp": time.time(),
+                    "durationMs": duration * 1000.0,
+                    "intervalMs": self.interval * 1000.0,
+                    "samples": dict(sampler.samples),
+                    "components": self._component_times(sampler.component_samples),
+                    "peakTracedBytes": peak,
+                    "allocations": allocations,
+                })
+
+    def list_profiles(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {key: value for key, value in profile.items() if key != "samples"}
+                for profile in self.profiles
+            ]
+
+    def get_profile(self, profile_id: str) -> Dict:
+        with self._lock:
+            for profile in self.profiles:
+                if profile["id"] == profile_id:
+                    return profile
+        raise ValueError(f"Profile {profile_id} not found")
+
+    def to_collapsed(self, profile_id: str) -> str:
+        """
+        Render a profile in the collapsed-stack format used by flamegraph tools.
+        """
+        profile = self.get_profile(profile_id)
+        lines = [
+            f"{';'.join(stack)} {count}"
+            for stack, count in profile["samples"].items()
+        ]
+        return "\n".join(lines) + "\n"
+
+    def to_speedscope(self, profile_id: str) -> Dict:
+        """
+        Render a profile as a speedscope sampled-profile document.
+        """
+        profile = self.get_profile(profile_id)
+        frame_index: Dict[str, int] = {}
+        frames = []
+        samples = []
+        weights = []
+
+        for stack, count in profile["samples"].items():
+            indices = []
+            for name in stack:
+                if name not in frame_index:
+                    frame_index[name] = len(frames)
+                    frames.append({"name": name})
+                indices.append(frame_index[name])
+            samples.append(indices)
+            weights.append(count * profile["intervalMs"])
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": f"{profile['endpoint']} {profile['id']}",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "name": profile["endpoint"],
+            "exporter": "prepease-ai-service",
+        }
+
+    def _component_times(self, component_samples: Counter) -> Dict[str, float]:
+        """
+        Attribute sampled wall time to the services seen on any sampled thread,
+        counting each tick once even if a request and its worker both show them.
+        """
+        return {
+            name: component_samples[name] * self.interval * 1000.0
+            for name in COMPONENTS
+        }
+
+    def _start_tracing(self) -> None:
+        with self._lock:
+            if self._active_traces == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_trace = True
+            self._active_traces += 1
+
+    def _stop_tracing(self) -> None:
+        with self._lock:
+            self._active_traces -= 1
+            if self._active_traces == 0 and self._owns_trace:
+                tracemalloc.stop()
+                self._owns_trace = False
@@ -20,6 +20,17 @@ class QAService:
         
         return answer
 
+    def answer_collection_question(self, collection_id: str, question: str) -> str:
+        """
+        Answer a question using context retrieved across every material in a collection.
+        """
+        if not self.vector_store.collection_exists(collection_id):
+            raise ValueError(f"Collection {collection_id} not found")
+
+        relevant_chunks = self.vector_store.retrieve_from_collection(collection_id, question, top_k=3)
+
+        return self._generate_answer(question, relevant_chunks)
+
     def _generate_answer(self, question: str, context_chunks: List[str]) -> str:
         """
         Generate answer from context chunks using rule-based extraction.
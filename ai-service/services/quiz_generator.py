@@ -2,6 +2,11 @@ import random
 import re
 from typing import List, Dict
 
+from services.term_index import TermIndex
+
+# How many nearest terms distractors are sampled from, per difficulty
+DISTRACTOR_WINDOWS = {"hard": 3, "medium": 8, "easy": 20}
+
 
 class QuizGenerator:
     def __init__(self, vector_store):
@@ -15,37 +20,81 @@ class QuizGenerator:
         if not self.vector_store.material_exists(material_id):
             raise ValueError(f"Material {material_id} not found")
 
-        chunks = self.vector_store.get_all_chunks(material_id)
+        term_index = self.vector_store.get_term_index(material_id)
         
-        questions = self._generate_questions_from_chunks(chunks, difficulty, question_count)
+        questions = self._generate_questions_from_index(term_index, difficulty, question_count)
         
         return questions
 
-    def _generate_questions_from_chunks(self, chunks: List[str], difficulty: str, count: int) -> List[Dict]:
+    def generate_collection_quiz(self, collection_id: str, difficulty: str, question_count: int) -> List[Dict]:
         """
-        Generate questions by extracting key information from chunks.
+        Generate quiz questions sampled across every material in a collection.
+        Each material contributes questions in proportion to its usable content.
         """
+        if not self.vector_store.collection_exists(collection_id):
+            raise ValueError(f"Collection {collection_id} not found")
+
+        term_indexes = list(self.vector_store.get_collection_term_indexes(collection_id).values())
+        pool_sizes = [len(term_index) for term_index in term_indexes]
+
+        count = min(question_count, sum(pool_sizes))
+
         questions = []
-        sentences = []
+        for term_index, allocation in zip(term_indexes, self._allocate_counts(pool_sizes, count)):
+            questions.extend(self._questions_from_index(term_index, difficulty, allocation))
+
+        random.shuffle(questions)
+
+        return self._pad_questions(questions, difficulty, count)
+
+    def _generate_questions_from_index(self, term_index: TermIndex, difficulty: str, count: int) -> List[Dict]:
+        """
+        Generate questions from the sentences and key terms indexed at ingest.
+        """
+        if len(term_index) < count:
+            count = len(term_index)
+
+        questions = self._questions_from_index(term_index, difficulty, count)
+
+        return self._pad_questions(questions, difficulty, count)
+
+    def _allocate_counts(self, pool_sizes: List[int], count: int) -> List[int]:
+        """
+        Split a question count across sentence pools proportionally (largest remainder).
+        """
+        total = sum(pool_sizes)
+        if total == 0:
+            return [0] * len(pool_sizes)
+
+        shares = [count * size / total for size in pool_sizes]
+        allocations = [int(share) for share in shares]
 
-        for chunk in chunks:
-            chunk_sentences = re.split(r'[.!?]+', chunk)
-            chunk_sentences = [s.strip() for s in chunk_sentences if len(s.strip()) > 30]
-            sentences.extend(chunk_sentences)
+        by_remainder = sorted(range(len(pool_sizes)), key=lambda i: shares[i] - allocations[i], reverse=True)
+        for i in by_remainder[:count - sum(allocations)]:
+            allocations[i] += 1
 
-        if len(sentences) < count:
-            count = len(sentences)
+        return allocations
 
-        selected_sentences = random.sample(sentences, min(count * 2, len(sentences)))
+    def _questions_from_index(self, term_index: TermIndex, difficulty: str, count: int) -> List[Dict]:
+        questions = []
+
+        sentence_count = len(term_index)
+        selected = random.sample(range(sentence_count), min(count * 2, sentence_count))
 
-        for sentence in selected_sentences:
+        for sentence_id in selected:
             if len(questions) >= count:
                 break
 
-            question = self._create_question_from_sentence(sentence, difficulty)
+            question = self._create_question_from_sentence(term_index, sentence_id, difficulty)
             if question:
                 questions.append(question)
 
+        return questions
+
+    def _pad_questions(self, questions: List[Dict], difficulty: str, count: int) -> List[Dict]:
+        """
+        Fill up to the requested count with generic questions when extraction falls short.
+        """
         if len(questions) < count:
             for i in range(count - len(questions)):
                 questions.append({
@@ -62,16 +111,17 @@ class QuizGenerator:
 
         return questions[:count]
 
-    def _create_question_from_sentence(self, sentence: str, difficulty: str) -> Dict:
+    def _create_question_from_sentence(self, term_index: TermIndex, sentence_id: int, difficulty: str) -> Dict:
         """
-        Create a multiple choice question from a sentence.
+        Create a multiple choice question from an indexed sentence.
         """
+        sentence = term_index.sentence(sentence_id)
         words = sentence.split()
         
         if len(words) < 8:
             return None
 
-        entities = self._extract_key_terms(sentence)
+        entities = term_index.sentence_terms(sentence_id)
         
         if not entities:
             return None
@@ -83,7 +133,7 @@ class QuizGenerator:
         if question_text == sentence:
             return None
 
-        distractors = self._generate_distractors(target, difficulty)
+        distractors = self._generate_distractors(term_index, target, difficulty)
         
         options = [target] + distractors
         random.shuffle(options)
@@ -97,28 +147,11 @@ class QuizGenerator:
             "difficulty": difficulty
         }
 
-    def _extract_key_terms(self, sentence: str) -> List[str]:
-        """
-        Extract important terms from a sentence (nouns, capitalized words, numbers).
-        """
-        entities = []
-        
-        capitalized = re.findall(r'\b[A-Z][a-z]+\b', sentence)
-        entities.extend(capitalized)
-
-        numbers = re.findall(r'\b\d+(?:\.\d+)?\b', sentence)
-        entities.extend(numbers)
-
-        words = sentence.split()
-        long_words = [w.strip(',.!?;:') for w in words if len(w) > 6 and w.lower() not in 
-                     ['however', 'therefore', 'although', 'because', 'through', 'without']]
-        entities.extend(long_words[:2])
-
-        return entities[:3]
-
-    def _generate_distractors(self, correct_answer: str, difficulty: str) -> List[str]:
+    def _generate_distractors(self, term_index: TermIndex, correct_answer: str, difficulty: str) -> List[str]:
         """
         Generate plausible but incorrect answer options.
+        Word answers draw on the nearest terms from the same material; harder
+        quizzes pick from a tighter neighbourhood.
         """
         distractors = []
         
@@ -137,13 +170,19 @@ class QuizGenerator:
                 f"{num * 1.5:.2f}"
             ]
         else:
+            window = DISTRACTOR_WINDOWS.get(difficulty, DISTRACTOR_WINDOWS["medium"])
+            candidates = term_index.nearest_terms(correct_answer, window)
+            if len(candidates) >= 3:
+                return random.sample(candidates, 3)
+
             prefixes = ["Neo-", "Proto-", "Meta-", "Pseudo-"]
             suffixes = ["-like", "-based", "-oriented", "-centric"]
             
-            distractors = [
+            fallback = [
                 f"{random.choice(prefixes)}{correct_answer}",
                 f"{correct_answer}{random.choice(suffixes)}",
                 f"Alternative {correct_answer}"
             ]
+            distractors = candidates + fallback[:3 - len(candidates)]
 
         return distractors[:3]
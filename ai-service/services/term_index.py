@@ -0,0 +1,171 @@
+import re
+from collections import Counter
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+
+
+STOP_TERMS = ['however', 'therefore', 'although', 'because', 'through', 'without']
+
+# Capitalized only because they start a sentence; never useful as answers or distractors
+FUNCTION_WORDS = {
+    'a', 'after', 'all', 'also', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'before',
+    'both', 'but', 'by', 'during', 'each', 'every', 'for', 'from', 'he', 'her', 'here',
+    'his', 'how', 'if', 'in', 'into', 'is', 'it', 'its', 'many', 'most', 'no', 'not',
+    'of', 'on', 'once', 'one', 'or', 'our', 'she', 'since', 'so', 'some', 'such', 'than',
+    'that', 'the', 'their', 'then', 'there', 'these', 'they', 'this', 'those', 'to',
+    'thus', 'under', 'unlike', 'when', 'where', 'which', 'while', 'who', 'why', 'with',
+    'we', 'what', 'you', 'your',
+}
+
+
+def sentence_spans(text: str, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+    """
+    Yield (start, end) offsets of sentences in text[start:end] long enough to
+    turn into quiz questions, with surrounding whitespace trimmed.
+    """
+    for match in re.compile(r'[^.!?]+').finditer(text, start, len(text) if end is None else end):
+        sentence = match.group()
+        stripped = sentence.strip()
+        if len(stripped) > 30:
+            left = match.start() + len(sentence) - len(sentence.lstrip())
+            yield left, left + len(stripped)
+
+
+def extract_key_terms(sentence: str) -> List[str]:
+    """
+    Extract important terms from a sentence (nouns, capitalized words, numbers).
+    """
+    entities = []
+
+    capitalized = re.findall(r'\b[A-Z][a-z]+\b', sentence)
+    entities.extend(w for w in capitalized if w.lower() not in FUNCTION_WORDS)
+
+    numbers = re.findall(r'\b\d+(?:\.\d+)?\b', sentence)
+    entities.extend(numbers)
+
+    words = sentence.split()
+    long_words = [
+        w.strip(',.!?;:') for w in words
+        if len(w) > 6 and w.lower() not in STOP_TERMS and w.lower() not in FUNCTION_WORDS
+    ]
+    entities.extend(long_words[:2])
+
+    return entities[:3]
+
+
+def _is_number(term: str) -> bool:
+    return re.fullmatch(r'\d+(?:\.\d+)?', term) is not None
+
+
+class TermIndex:
+    """
+    Per-material vocabulary built once at ingest: quiz sentences with their key
+    terms and the nearest-neighbour terms of each word term (by embedding
+    similarity) used as distractors. Word terms are ordered by how many
+    sentences use them, and only the max_terms most frequent get neighbours.
+
+    Sentences are kept as offsets into the packed chunk text and their key
+    terms as ids into the vocabulary (CSR layout), so the index holds no
+    per-sentence Python objects.
+    """
+
+    def __init__(
+        self,
+        chunk_text: str,
+        offsets: np.ndarray,
+        encoder,
+        max_terms: int = 2000,
+        neighbours: int = 30,
+        batch_size: int = 64,
+    ):
+        self.text = chunk_text
+
+        spans = []
+        term_offsets = [0]
+        term_ids = []
+        counts = Counter()
+        vocabulary = {}
+
+        for chunk in range(len(offsets) - 1):
+            for start, end in sentence_spans(chunk_text, int(offsets[chunk]), int(offsets[chunk + 1])):
+                terms = [term for term in extract_key_terms(chunk_text[start:end]) if term]
+                spans.append((start, end))
+                counts.update(set(terms))
+                term_ids.extend(vocabulary.setdefault(term, len(vocabulary)) for term in terms)
+                term_offsets.append(len(term_ids))
+
+        self.spans = np.array(spans, dtype=np.int64).reshape(-1, 2)
+        self.term_offsets = np.array(term_offsets, dtype=np.int32)
+
+        # Word terms by frequency first (these get neighbours), then numbers
+        words = [term for term, _ in counts.most_common() if not _is_number(term)]
+        numbers = [term for term in vocabulary if _is_number(term)]
+        self.terms = words + numbers
+        self.term_ids = {term: i for i, term in enumerate(self.terms)}
+
+        remap = np.empty(len(vocabulary), dtype=np.int32)
+        for term, old_id in vocabulary.items():
+            remap[old_id] = self.term_ids[term]
+        self.sentence_term_ids = remap[np.array(term_ids, dtype=np.int32)] if term_ids else np.zeros(0, dtype=np.int32)
+
+        self.word_count = min(len(words), max_terms)
+        self.neighbours = self._nearest_neighbours(encoder, neighbours, batch_size)
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def sentence(self, sentence_id: int) -> str:
+        start, end = self.spans[sentence_id]
+        return self.text[start:end]
+
+    def sentence_terms(self, sentence_id: int) -> List[str]:
+        ids = self.sentence_term_ids[self.term_offsets[sentence_id]:self.term_offsets[sentence_id + 1]]
+        return [self.terms[i] for i in ids]
+
+    def nearest_terms(self, term: str, limit: int) -> List[str]:
+        """
+        Closest distinct terms from the same material, best first.
+        Variants of the term itself (e.g. plurals) are skipped.
+        """
+        term_id = self.term_ids.get(term)
+        if term_id is None or term_id >= len(self.neighbours):
+            return []
+
+        term_lower = term.lower()
+        candidates = []
+        for neighbour_id in self.neighbours[term_id]:
+            candidate = self.terms[neighbour_id]
+            candidate_lower = candidate.lower()
+            if term_lower in candidate_lower or candidate_lower in term_lower:
+                continue
+            candidates.append(candidate)
+            if len(candidates) >= limit:
+                break
+
+        return candidates
+
+    def _nearest_neighbours(self, encoder, neighbours: int, batch_size: int) -> np.ndarray:
+        """
+        Embed the most frequent word terms in batches and keep the top
+        neighbour ids per term.
+        """
+        terms = self.terms[:self.word_count]
+        if len(terms) < 2:
+            return np.zeros((len(terms), 0), dtype=np.int32)
+
+        embeddings = encoder.encode(terms, batch_size=batch_size)
+        embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+        k = min(neighbours, len(terms) - 1)
+        result = np.empty((len(terms), k), dtype=np.int32)
+
+        for start in range(0, len(terms), 512):
+            similarities = embeddings[start:start + 512] @ embeddings.T
+            rows = np.arange(len(similarities))
+            similarities[rows, rows + start] = -np.inf
+
+            top = np.argpartition(similarities, -k, axis=1)[:, -k:]
+            order = np.argsort(np.take_along_axis(similarities, top, axis=1), axis=1)[:, ::-1]
+            result[start:start + len(similarities)] = np.take_along_axis(top, order, axis=1)
+
+        return result
@@ -1,33 +1,123 @@
-from typing import List, Dict, Tuple
+import os
+import tempfile
+import threading
+import uuid
+from typing import List, Dict, Optional, Set, Tuple
 import numpy as np
 from sentence_transformers import SentenceTransformer
 
 from services.text_chunker import TextChunker
+from services.term_index import TermIndex
+from services.compact_storage import pack_chunks, quantize_int8, search_int8, unpack_chunk, write_full_precision
+
+STORAGE_MODES = ("float32", "int8")
 
 
 class VectorStore:
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        storage_mode: str = "float32",
+        scheduler=None,
+        vectors_dir: Optional[str] = None,
+    ):
+        if storage_mode not in STORAGE_MODES:
+            raise ValueError(f"Unsupported storage mode: {storage_mode}")
+
         self.model = SentenceTransformer(model_name)
+        self.storage_mode = storage_mode
+        # int8 mode keeps full-precision vectors on disk for the exact re-rank
+        self.vectors_dir = vectors_dir
+        if storage_mode == "int8" and vectors_dir is None:
+            self.vectors_dir = tempfile.mkdtemp(prefix="prepease-vectors-")
+        self.scheduler = scheduler
         self.storage: Dict[str, Dict] = {}
+        self.collections: Dict[str, Set[str]] = {}
+        self._collection_index: Dict[str, Dict] = {}
+        # Guards storage, collection membership and the cached collection indexes
+        self._lock = threading.RLock()
         self.chunker = TextChunker(chunk_size=500, overlap=50)
 
     def ingest(self, material_id: str, text: str) -> None:
         """
         Chunk text, generate embeddings, and store in memory.
         """
+        chunks = self._chunk(text)
+        embeddings = self.encode(chunks)
+        self._store(material_id, chunks, embeddings)
+
+    async def ingest_async(self, material_id: str, text: str, batch_size: int = 32) -> None:
+        """
+        ingest for async handlers: chunking, each encode batch and storing are
+        separate scheduler jobs, awaited without holding a thread.
+        """
+        chunks = await self.scheduler.run_async(self._chunk, text)
+        batches = await self.scheduler.map_batches_async(
+            lambda batch: self._encode_batch(batch, batch_size),
+            chunks,
+            batch_size
+        )
+        await self.scheduler.run_async(self._store, material_id, chunks, np.vstack(batches))
+
+    def _encode_batch(self, batch: List[str], batch_size: int) -> np.ndarray:
+        return self.model.encode(batch, batch_size=batch_size, convert_to_numpy=True)
+
+    def _chunk(self, text: str) -> List[str]:
         chunks = self.chunker.chunk_text(text)
-        
+
         if not chunks:
             raise ValueError("No valid text chunks generated")
+        return chunks
 
-        embeddings = self.model.encode(chunks, convert_to_numpy=True)
-
-        self.storage[material_id] = {
-            "chunks": chunks,
-            "embeddings": embeddings,
-            "full_text": text
+    def _store(self, material_id: str, chunks: List[str], embeddings: np.ndarray) -> None:
+        """
+        Build the material's storage (term index included) and swap it in.
+        """
+        # Chunk text is stored once, packed; the term index points into the same buffer
+        chunk_text, offsets = pack_chunks(chunks)
+        data = {
+            "chunk_text": chunk_text,
+            "offsets": offsets,
+            "term_index": TermIndex(chunk_text, offsets, self),
         }
 
+        if self.storage_mode == "int8":
+            codes, scales = quantize_int8(embeddings)
+            vectors_path = os.path.join(self.vectors_dir, f"{uuid.uuid4().hex}.f32")
+            data["codes"] = codes
+            data["scales"] = scales
+            data["vectors"] = write_full_precision(embeddings, vectors_path)
+            data["vectors_path"] = vectors_path
+        else:
+            data["embeddings"] = embeddings
+
+        with self._lock:
+            previous = self.storage.get(material_id)
+            self.storage[material_id] = data
+            self._invalidate_collections(material_id)
+
+        # Open memmaps (e.g. in a collection index being searched) stay valid after unlink
+        if previous is not None and "vectors_path" in previous:
+            try:
+                os.remove(previous["vectors_path"])
+            except OSError:
+                pass
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Embed texts. With a scheduler, each batch is a separate fair-queued job
+        so large ingests cannot hold the model for long stretches.
+        """
+        if self.scheduler is None:
+            return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+        batches = self.scheduler.map_batches(
+            lambda batch: self._encode_batch(batch, batch_size),
+            texts,
+            batch_size
+        )
+        return np.vstack(batches)
+
     def retrieve(self, material_id: str, query: str, top_k: int = 3) -> List[str]:
         """
         Retrieve most relevant chunks for a query using cosine similarity.
@@ -36,12 +126,18 @@ class VectorStore:
             raise ValueError(f"Material {material_id} not found")
 
         data = self.storage[material_id]
-        query_embedding = self.model.encode([query], convert_to_numpy=True)[0]
+        query_embedding = self.encode([query])[0]
 
-        similarities = self._cosine_similarity(query_embedding, data["embeddings"])
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
+        if self.storage_mode == "int8":
+            top_indices = search_int8(
+                data["codes"], data["scales"], query_embedding, top_k,
+                rerank=lambda rows: data["vectors"][rows],
+            )
+        else:
+            similarities = self._cosine_similarity(query_embedding, data["embeddings"])
+            top_indices = np.argsort(similarities)[-top_k:][::-1]
 
-        return [data["chunks"][i] for i in top_indices]
+        return [self._chunk_from(data, i) for i in top_indices]
 
     def get_all_chunks(self, material_id: str) -> List[str]:
         """
@@ -50,7 +146,146 @@ class VectorStore:
         if material_id not in self.storage:
             raise ValueError(f"Material {material_id} not found")
         
-        return self.storage[material_id]["chunks"]
+        return self._chunks(material_id)
+
+    def get_term_index(self, material_id: str) -> TermIndex:
+        """
+        Get the vocabulary index built at ingest (used for quiz generation).
+        """
+        if material_id not in self.storage:
+            raise ValueError(f"Material {material_id} not found")
+
+        return self.storage[material_id]["term_index"]
+
+    def add_to_collection(self, collection_id: str, material_ids: List[str]) -> None:
+        """
+        Add materials to a collection (e.g. a course). A material may belong to several collections.
+        """
+        with self._lock:
+            self.collections.setdefault(collection_id, set()).update(material_ids)
+            self._collection_index.pop(collection_id, None)
+
+    def remove_from_collection(self, collection_id: str, material_id: str) -> None:
+        with self._lock:
+            if collection_id not in self.collections:
+                raise ValueError(f"Collection {collection_id} not found")
+
+            self.collections[collection_id].discard(material_id)
+            self._collection_index.pop(collection_id, None)
+
+    def delete_collection(self, collection_id: str) -> None:
+        with self._lock:
+            if collection_id not in self.collections:
+                raise ValueError(f"Collection {collection_id} not found")
+
+            del self.collections[collection_id]
+            self._collection_index.pop(collection_id, None)
+
+    def retrieve_from_collection(self, collection_id: str, query: str, top_k: int = 3) -> List[str]:
+        """
+        Retrieve the most relevant chunks across every material in a collection
+        with a single pass over the stacked, pre-normalized embedding matrix.
+        """
+        index = self._get_collection_index(collection_id)
+        query_embedding = self.encode([query])[0]
+
+        if self.storage_mode == "int8":
+            top_indices = search_int8(
+                index["codes"], index["scales"], query_embedding, top_k,
+                rerank=lambda rows: self._collection_vectors(index, rows),
+            )
+        else:
+            query_norm = query_embedding / np.linalg.norm(query_embedding)
+            similarities = np.dot(index["embeddings"], query_norm)
+            top_k = min(top_k, len(similarities))
+            top_indices = np.argpartition(similarities, -top_k)[-top_k:]
+            top_indices = top_indices[np.argsort(similarities[top_indices])[::-1]]
+
+        positions = np.searchsorted(index["starts"], top_indices, side="right") - 1
+        return [
+            self._chunk_from(index["data"][pos], row - index["starts"][pos])
+            for pos, row in zip(positions, top_indices)
+        ]
+
+    def get_collection_term_indexes(self, collection_id: str) -> Dict[str, TermIndex]:
+        with self._lock:
+            return {
+                material_id: self.storage[material_id]["term_index"]
+                for material_id in self._collection_materials(collection_id)
+            }
+
+    def collection_exists(self, collection_id: str) -> bool:
+        return collection_id in self.collections
+
+    def _collection_materials(self, collection_id: str) -> List[str]:
+        """
+        Ingested members of a collection, in a stable order.
+        """
+        if collection_id not in self.collections:
+            raise ValueError(f"Collection {collection_id} not found")
+
+        material_ids = sorted(m for m in self.collections[collection_id] if m in self.storage)
+        if not material_ids:
+            raise ValueError(f"Collection {collection_id} has no ingested materials")
+
+        return material_ids
+
+    def _get_collection_index(self, collection_id: str) -> Dict:
+        """
+        Build (or reuse) the stacked embedding matrix for a collection.
+        The index keeps the storage entries it was built from, so chunk lookups
+        stay consistent with its rows even if a member is re-ingested meanwhile.
+        """
+        with self._lock:
+            if collection_id in self._collection_index:
+                return self._collection_index[collection_id]
+
+            material_ids = self._collection_materials(collection_id)
+            data = [self.storage[material_id] for material_id in material_ids]
+
+            index = self._build_collection_index(data)
+            self._collection_index[collection_id] = index
+            return index
+
+    def _build_collection_index(self, data: List[Dict]) -> Dict:
+        key = "codes" if self.storage_mode == "int8" else "embeddings"
+
+        sizes = [len(d[key]) for d in data]
+        index = {
+            "data": data,
+            "starts": np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64),
+        }
+
+        if self.storage_mode == "int8":
+            index["codes"] = np.vstack([d["codes"] for d in data])
+            index["scales"] = np.concatenate([d["scales"] for d in data])
+        else:
+            embeddings = np.vstack([d["embeddings"] for d in data])
+            index["embeddings"] = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+        return index
+
+    def _collection_vectors(self, index: Dict, rows: np.ndarray) -> np.ndarray:
+        """
+        Gather full-precision vectors for stacked collection rows from each member's file.
+        """
+        positions = np.searchsorted(index["starts"], rows, side="right") - 1
+        return np.stack([
+            index["data"][pos]["vectors"][row - index["starts"][pos]]
+            for pos, row in zip(positions, rows)
+        ])
+
+    def _chunks(self, material_id: str) -> List[str]:
+        data = self.storage[material_id]
+        return [unpack_chunk(data["chunk_text"], data["offsets"], i) for i in range(len(data["offsets"]) - 1)]
+
+    def _chunk_from(self, data: Dict, index: int) -> str:
+        return unpack_chunk(data["chunk_text"], data["offsets"], index)
+
+    def _invalidate_collections(self, material_id: str) -> None:
+        for collection_id, material_ids in self.collections.items():
+            if material_id in material_ids:
+                self._collection_index.pop(collection_id, None)
 
     def _cosine_similarity(self, query_vec: np.ndarray, embeddings: np.ndarray) -> np.ndarray:
         """
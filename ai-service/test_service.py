@@ -73,6 +73,92 @@ def test_quiz():
     
     return response.status_code == 200
 
+def test_collections():
+    print("\n=== Testing Course Collections ===")
+    ingest = requests.post(f"{BASE_URL}/ingest", json={
+        "materialId": "test_material_2",
+        "extractedText": """
+        Supervised learning trains models on labelled examples to predict outputs.
+        Reinforcement learning trains agents through rewards received from an environment.
+        Gradient descent minimises a loss function by following its negative gradient.
+        """
+    })
+    print(f"Ingest second material: {ingest.status_code}")
+
+    collection_url = f"{BASE_URL}/collections/test_course_1"
+    response = requests.put(collection_url, json={"materialIds": ["test_material_1", "test_material_2"]})
+    print(f"Create collection: {response.status_code} {response.json()}")
+
+    chat = requests.post(f"{collection_url}/chat", json={"question": "What is reinforcement learning?"})
+    print(f"Collection chat: {chat.status_code} {chat.json()}")
+
+    quiz = requests.post(f"{collection_url}/generate-quiz", json={"difficulty": "easy", "questionCount": 4})
+    print(f"Collection quiz: {quiz.status_code}, {len(quiz.json().get('questions', []))} questions")
+
+    removed = requests.delete(f"{collection_url}/materials/test_material_2")
+    print(f"Remove material: {removed.status_code}")
+
+    deleted = requests.delete(collection_url)
+    missing = requests.post(f"{collection_url}/chat", json={"question": "Anything?"})
+    print(f"Delete collection: {deleted.status_code}, chat afterwards: {missing.status_code}")
+
+    return (
+        response.status_code == 200
+        and chat.status_code == 200
+        and quiz.status_code == 200
+        and removed.status_code == 200
+        and deleted.status_code == 200
+        and missing.status_code == 404
+    )
+
+def test_scheduler_stats():
+    print("\n=== Testing Scheduler Stats ===")
+    payload = {
+        "materialId": "test_material_1",
+        "question": "What is computer vision?"
+    }
+    chat = requests.post(f"{BASE_URL}/chat", json=payload, headers={"X-Tenant-Id": "test_student_1"})
+    print(f"Chat as tenant: {chat.status_code}")
+
+    response = requests.get(f"{BASE_URL}/scheduler/stats")
+    stats = response.json()
+    print(f"Status: {response.status_code}")
+    print(f"Response: {stats}")
+
+    return (
+        chat.status_code == 200
+        and response.status_code == 200
+        and stats["interactive"]["completed"] > 0
+        and stats["bulk"]["completed"] > 0
+    )
+
+def test_profiling():
+    print("\n=== Testing Request Profiling ===")
+    payload = {
+        "materialId": "test_material_1",
+        "question": "What is deep learning?"
+    }
+    response = requests.post(f"{BASE_URL}/chat?profile=1", json=payload)
+    profile_id = response.headers.get("X-Profile-Id")
+    print(f"Status: {response.status_code}, X-Profile-Id: {profile_id}")
+    if not profile_id:
+        return False
+
+    listed = requests.get(f"{BASE_URL}/profiles").json()["profiles"]
+    print(f"Stored profiles: {len(listed)}")
+
+    collapsed = requests.get(f"{BASE_URL}/profiles/{profile_id}/collapsed")
+    print(f"Collapsed stacks: {len(collapsed.text.splitlines())} lines")
+
+    speedscope = requests.get(f"{BASE_URL}/profiles/{profile_id}/speedscope")
+    print(f"Speedscope frames: {len(speedscope.json()['shared']['frames'])}")
+
+    return (
+        any(profile["id"] == profile_id for profile in listed)
+        and collapsed.status_code == 200
+        and speedscope.status_code == 200
+    )
+
 if __name__ == "__main__":
     print("=" * 50)
     print("PrepEase AI Microservice Tests")
@@ -86,7 +172,10 @@ if __name__ == "__main__":
             "Health Check": test_health(),
             "Ingest Material": test_ingest(),
             "Chat/QA": test_chat(),
-            "Quiz Generation": test_quiz()
+            "Quiz Generation": test_quiz(),
+            "Course Collections": test_collections(),
+            "Scheduler Stats": test_scheduler_stats(),
+            "Request Profiling": test_profiling()
         }
         
         print("\n" + "=" * 50)
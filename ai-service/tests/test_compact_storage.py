@@ -0,0 +1,73 @@
+import numpy as np
+
+from services.compact_storage import pack_chunks, quantize_int8, search_int8, unpack_chunk, write_full_precision
+
+
+def clustered_embeddings(n_rows=3000, dim=64, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_rows // 50, dim)).astype(np.float32)
+    assignments = rng.integers(0, len(centers), size=n_rows)
+    return centers[assignments] + 0.5 * rng.normal(size=(n_rows, dim)).astype(np.float32)
+
+
+def exact_search(embeddings, query, top_k):
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    return np.argsort(scores)[-top_k:][::-1]
+
+
+def test_quantized_rows_stay_close_to_normalized_vectors():
+    embeddings = clustered_embeddings(200)
+    codes, scales = quantize_int8(embeddings)
+
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    error = np.abs(codes.astype(np.float32) * scales[:, None] - normalized).max(axis=1)
+
+    assert codes.dtype == np.int8
+    assert np.all(error <= scales / 2 + 1e-6)
+
+
+def recall(embeddings, codes, scales, top_k=3, **kwargs):
+    rng = np.random.default_rng(1)
+    rows = rng.integers(0, len(embeddings), size=100)
+    queries = embeddings[rows] + 0.3 * rng.normal(size=(100, embeddings.shape[1])).astype(np.float32)
+
+    hits = 0
+    for query in queries:
+        expected = exact_search(embeddings, query, top_k)
+        found = search_int8(codes, scales, query, top_k, **kwargs)
+        hits += len(set(expected.tolist()) & set(found.tolist()))
+    return hits / (len(queries) * top_k)
+
+
+def test_search_int8_recall_against_float32():
+    embeddings = clustered_embeddings()
+    codes, scales = quantize_int8(embeddings)
+
+    assert recall(embeddings, codes, scales) >= 0.9
+
+
+def test_rerank_against_full_precision_vectors_is_exact(tmp_path):
+    embeddings = clustered_embeddings()
+    codes, scales = quantize_int8(embeddings)
+    vectors = write_full_precision(embeddings, str(tmp_path / "vectors.f32"))
+
+    assert recall(embeddings, codes, scales, rerank=lambda rows: vectors[rows]) == 1.0
+
+
+def test_search_int8_orders_best_first_and_caps_top_k():
+    codes, scales = quantize_int8(np.eye(4, dtype=np.float32) + 0.01)
+    query = np.array([0.1, 0.2, 1.0, 0.3], dtype=np.float32)
+
+    found = search_int8(codes, scales, query, top_k=10)
+
+    assert len(found) == 4
+    assert found[0] == 2
+    assert found[1] == 3
+
+
+def test_pack_chunks_round_trip():
+    chunks = ["first chunk", "", "third – with unicode"]
+    text, offsets = pack_chunks(chunks)
+
+    assert [unpack_chunk(text, offsets, i) for i in range(len(chunks))] == chunks
@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+pptx = pytest.importorskip("pptx")
+
+from pptx.util import Inches
+
+from services import extractor
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    extractor._file_cache.clear()
+    extractor._page_cache.clear()
+    yield
+    extractor._file_cache.clear()
+    extractor._page_cache.clear()
+
+
+def write_text_pdf(path, pages):
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(path)
+    doc.close()
+
+
+def write_xobject_pdf(path, text, scratch):
+    """A page whose content stream only paints a form XObject."""
+    source_path = os.path.join(scratch, f"source-{text}.pdf")
+    write_text_pdf(source_path, [text])
+
+    doc = fitz.open()
+    with fitz.open(source_path) as source:
+        page = doc.new_page()
+        page.show_pdf_page(page.rect, source, 0)
+    doc.save(path)
+    doc.close()
+
+
+def write_deck(path, titles, notes=None, table=None):
+    deck = pptx.Presentation()
+    for i, title in enumerate(titles):
+        slide = deck.slides.add_slide(deck.slide_layouts[5])
+        slide.shapes.title.text = title
+        if notes and i in notes:
+            slide.notes_slide.notes_text_frame.text = notes[i]
+        if table and i == 0:
+            shape = slide.shapes.add_table(len(table), len(table[0]), Inches(1), Inches(2), Inches(6), Inches(2))
+            for r, row in enumerate(table):
+                for c, value in enumerate(row):
+                    shape.table.cell(r, c).text = value
+    deck.save(path)
+
+
+def count_calls(monkeypatch, name):
+    calls = []
+    original = getattr(extractor, name)
+
+    def wrapper(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(extractor, name, wrapper)
+    return calls
+
+
+def test_unchanged_pdf_is_served_from_cache(tmp_path, monkeypatch):
+    path = str(tmp_path / "notes.pdf")
+    write_text_pdf(path, ["Photosynthesis", "Respiration"])
+
+    first = extractor.extract_text(path)
+    opened = count_calls(monkeypatch, "_pdf_page_digest")
+    second = extractor.extract_text(path)
+
+    assert "Photosynthesis" in first and "Respiration" in first
+    assert second == first
+    assert opened == []
+
+
+def test_xobject_pages_do_not_collide_across_files(tmp_path):
+    first = str(tmp_path / "first.pdf")
+    second = str(tmp_path / "second.pdf")
+    write_xobject_pdf(first, "Mitochondria", str(tmp_path))
+    write_xobject_pdf(second, "Chloroplast", str(tmp_path))
+
+    with fitz.open(first) as a, fitz.open(second) as b:
+        assert a[0].read_contents() == b[0].read_contents()
+
+    assert "Mitochondria" in extractor.extract_text(first)
+    assert "Chloroplast" in extractor.extract_text(second)
+
+
+def test_xobject_page_rewritten_in_place_is_re_extracted(tmp_path):
+    path = str(tmp_path / "lecture.pdf")
+    write_xobject_pdf(path, "Mitochondria", str(tmp_path))
+    assert "Mitochondria" in extractor.extract_text(path)
+
+    write_xobject_pdf(path, "Chloroplast", str(tmp_path))
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+    text = extractor.extract_text(path)
+    assert "Chloroplast" in text
+    assert "Mitochondria" not in text
+
+
+def test_only_changed_slides_are_re_extracted(tmp_path, monkeypatch):
+    path = str(tmp_path / "deck.pptx")
+    write_deck(path, ["Cells", "Tissues", "Organs"])
+    extractor.extract_text(path)
+
+    write_deck(path, ["Cells", "Tissues", "Organ systems"])
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    extracted = count_calls(monkeypatch, "_extract_slide")
+
+    text = extractor.extract_text(path)
+
+    assert len(extracted) == 1
+    assert "Organ systems" in text
+    assert "Cells" in text
+
+
+def test_pptx_tables_and_notes_are_extracted(tmp_path):
+    path = str(tmp_path / "deck.pptx")
+    write_deck(
+        path,
+        ["Enzymes"],
+        notes={0: "Remember the lock and key model"},
+        table=[["Enzyme", "Substrate"], ["Amylase", "Starch"]],
+    )
+
+    text = extractor.extract_text(path)
+
+    assert "Enzyme | Substrate" in text
+    assert "Amylase | Starch" in text
+    assert "Remember the lock and key model" in text
+
+
+def test_concurrent_large_extractions_share_one_pool(tmp_path, monkeypatch):
+    created = []
+
+    class RecordingPool:
+        def __init__(self, *args, **kwargs):
+            time.sleep(0.05)  # widen the window for a second thread to race in
+            created.append(self)
+
+        def submit(self, fn, *args):
+            future = Future()
+            future.set_result(fn(*args))
+            return future
+
+    monkeypatch.setattr(extractor, "_executor", None)
+    monkeypatch.setattr(extractor, "ProcessPoolExecutor", RecordingPool)
+    monkeypatch.setattr(extractor, "MAX_WORKERS", 4)
+    monkeypatch.setattr(extractor, "PARALLEL_MIN_PAGES", 2)
+
+    paths = []
+    for i in range(4):
+        path = str(tmp_path / f"lecture-{i}.pdf")
+        write_text_pdf(path, [f"Lecture {i} page {page}" for page in range(3)])
+        paths.append(path)
+
+    threads = [threading.Thread(target=extractor.extract_text, args=(path,)) for path in paths]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert "Lecture 3 page 2" in extractor.extract_text(paths[3])
@@ -0,0 +1,60 @@
+import time
+
+from services.profiler import RequestProfiler, attach_worker
+from prepease_shared.scheduler import INTERACTIVE, ModelScheduler
+
+
+def encode_on_worker(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_profile_samples_scheduler_worker_threads():
+    profiler = RequestProfiler(interval_ms=1)
+    scheduler = ModelScheduler(workers=1, job_hooks=[attach_worker])
+
+    with scheduler.admit("student", INTERACTIVE), profiler.profile("/chat") as profile_id:
+        scheduler.run(encode_on_worker, 0.1)
+
+    stacks = profiler.get_profile(profile_id)["samples"]
+    worker_stacks = [stack for stack in stacks if stack[0] == "[model-scheduler-0]"]
+
+    assert worker_stacks
+    assert any("encode_on_worker" in frame for stack in worker_stacks for frame in stack)
+
+
+def test_jobs_outside_a_profile_are_not_attached():
+    profiler = RequestProfiler(interval_ms=1)
+    scheduler = ModelScheduler(workers=1, job_hooks=[attach_worker])
+
+    with scheduler.admit("student", INTERACTIVE):
+        scheduler.run(encode_on_worker, 0.02)
+    with profiler.profile("/chat") as profile_id:
+        time.sleep(0.02)
+
+    stacks = profiler.get_profile(profile_id)["samples"]
+    assert all(stack[0] != "[model-scheduler-0]" for stack in stacks)
+
+
+def test_collapsed_output_is_rooted_at_thread_name():
+    profiler = RequestProfiler(interval_ms=1)
+
+    with profiler.profile("/chat") as profile_id:
+        encode_on_worker(0.02)
+
+    lines = profiler.to_collapsed(profile_id).strip().splitlines()
+    assert lines
+    assert all(line.startswith("[MainThread];") for line in lines)
+
+
+def test_async_handler_profiles_only_worker_threads():
+    profiler = RequestProfiler(interval_ms=1)
+    scheduler = ModelScheduler(workers=1, job_hooks=[attach_worker])
+
+    with scheduler.admit("student", INTERACTIVE), profiler.profile("/chat", sample_caller=False) as profile_id:
+        scheduler.run(encode_on_worker, 0.05)
+
+    stacks = profiler.get_profile(profile_id)["samples"]
+    assert stacks
+    assert all(stack[0] == "[model-scheduler-0]" for stack in stacks)
@@ -0,0 +1,32 @@
+from services.quiz_generator import QuizGenerator
+
+
+def make_generator():
+    return QuizGenerator(vector_store=None)
+
+
+def test_allocate_counts_is_proportional():
+    pool_sizes = [10, 30]
+
+    assert make_generator()._allocate_counts(pool_sizes, 8) == [2, 6]
+
+
+def test_allocate_counts_uses_largest_remainder():
+    pool_sizes = [5, 15]
+
+    allocations = make_generator()._allocate_counts(pool_sizes, 7)
+
+    assert allocations == [2, 5]
+    assert sum(allocations) == 7
+
+
+def test_allocate_counts_never_exceeds_pool_size():
+    pool_sizes = [1, 2, 3]
+
+    allocations = make_generator()._allocate_counts(pool_sizes, 6)
+
+    assert allocations == [1, 2, 3]
+
+
+def test_allocate_counts_with_empty_pools():
+    assert make_generator()._allocate_counts([0, 0], 3) == [0, 0]
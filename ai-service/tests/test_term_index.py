@@ -0,0 +1,106 @@
+import zlib
+
+import numpy as np
+
+from services.compact_storage import pack_chunks
+from services.quiz_generator import QuizGenerator
+from services.term_index import TermIndex, extract_key_terms
+
+
+class HashEncoder:
+    """Deterministic stand-in for the sentence encoder."""
+
+    def encode(self, texts, batch_size=32):
+        return np.stack([
+            np.random.default_rng(zlib.crc32(text.lower().rstrip("s").encode())).normal(size=16)
+            for text in texts
+        ]).astype(np.float32)
+
+
+CHUNKS = [
+    "The Mitochondria produces energy for the whole cell in 2 stages. "
+    "The Chloroplast captures sunlight inside every plant leaf cell. ",
+    "The Ribosome assembles proteins from amino acids in the cytoplasm. "
+    "The Nucleus stores genetic information within chromosomes. "
+    "Short one.",
+]
+
+
+def build_index(chunks=CHUNKS, **kwargs):
+    chunk_text, offsets = pack_chunks(chunks)
+    return TermIndex(chunk_text, offsets, HashEncoder(), **kwargs), chunk_text
+
+
+def test_sentences_are_stored_as_offsets_into_chunk_text():
+    index, chunk_text = build_index()
+
+    assert len(index) == 4
+    assert index.text is chunk_text
+    assert index.spans.dtype == np.int64
+    assert index.sentence(0) == "The Mitochondria produces energy for the whole cell in 2 stages"
+    assert index.sentence(3) == "The Nucleus stores genetic information within chromosomes"
+
+
+def test_sentence_terms_are_compact_ids():
+    index, _ = build_index()
+
+    assert index.sentence_term_ids.dtype == np.int32
+    assert index.term_offsets.dtype == np.int32
+    assert index.sentence_terms(0) == ["Mitochondria", "2", "Mitochondria"]
+    assert all(isinstance(term, str) for i in range(len(index)) for term in index.sentence_terms(i))
+
+
+def test_numbers_have_no_neighbours():
+    index, _ = build_index()
+
+    assert index.nearest_terms("2", 3) == []
+    assert len(index.neighbours) == index.word_count
+
+
+def test_function_words_are_never_terms():
+    index, _ = build_index()
+
+    assert "The" not in index.term_ids
+    assert "The" not in index.nearest_terms("Mitochondria", 10)
+    assert set(index.nearest_terms("Mitochondria", 10)) >= {"Chloroplast", "Ribosome", "Nucleus"}
+
+
+def test_function_words_do_not_crowd_out_key_terms():
+    assert extract_key_terms("This shows that The Krebs Cycle releases carbon dioxide") == [
+        "Krebs", "Cycle", "releases",
+    ]
+
+
+PHOTOSYNTHESIS = [
+    "Photosynthesis converts light energy into chemical energy inside plant cells. "
+    "The Chloroplast is the organelle where Photosynthesis takes place in leaves. "
+    "This process needs carbon dioxide, water and sunlight to produce glucose. "
+    "Photosynthesis releases oxygen as a byproduct into the surrounding atmosphere. "
+    "The light reactions happen in the Thylakoid membranes of each chloroplast. "
+    "The Calvin cycle fixes carbon dioxide into sugar molecules in the stroma. ",
+    "Chlorophyll absorbs mostly blue and red wavelengths of visible light. "
+    "Photosynthesis rates rise with light intensity until another factor limits them. "
+    "The Stomata open during the day so carbon dioxide can enter the leaf. "
+    "This balance between water loss and gas exchange matters for dry climates. "
+    "Photosynthesis in Algae contributes much of the oxygen found in the oceans. "
+    "The Rubisco enzyme catalyses the first step of carbon fixation in plants. ",
+]
+
+
+def test_main_topic_term_remains_an_answer():
+    index, _ = build_index(PHOTOSYNTHESIS)
+
+    assert len(index) == 12
+    first_terms = [index.sentence_terms(i)[0] for i in range(len(index)) if index.sentence_terms(i)]
+    assert first_terms.count("Photosynthesis") >= 4
+    assert "The" not in index.term_ids and "This" not in index.term_ids
+
+
+def test_topic_question_blanks_the_topic_term():
+    index, _ = build_index(PHOTOSYNTHESIS)
+
+    question = QuizGenerator(vector_store=None)._create_question_from_sentence(index, 0, "medium")
+
+    assert question["question"].startswith("Fill in the blank: _____ converts light energy")
+    assert question["options"][question["correctAnswer"]] == "Photosynthesis"
+    assert "The" not in question["options"]
@@ -0,0 +1,152 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+from prepease_shared.scheduler import BULK, ModelScheduler
+from services import vector_store as vector_store_module
+from services.text_chunker import TextChunker
+from services.vector_store import STORAGE_MODES, VectorStore
+
+
+class WordEncoder:
+    """Bag-of-words stand-in for the sentence encoder: one axis per distinct word."""
+
+    def __init__(self, *args, **kwargs):
+        self.vocabulary = {}
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        vectors = np.zeros((len(texts), 64), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, self.vocabulary.setdefault(word, len(self.vocabulary))] += 1.0
+        return vectors
+
+
+def words(*names):
+    """One four-word chunk per name."""
+    return " ".join(" ".join([name] * 4) for name in names)
+
+
+@pytest.fixture(params=STORAGE_MODES)
+def store(request, monkeypatch):
+    monkeypatch.setattr(vector_store_module, "SentenceTransformer", WordEncoder)
+    store = VectorStore(storage_mode=request.param)
+    store.chunker = TextChunker(chunk_size=4, overlap=0)
+    return store
+
+
+def top_chunk(store, collection_id, word):
+    return store.retrieve_from_collection(collection_id, word, top_k=1)[0]
+
+
+def test_rows_map_back_to_each_materials_chunks(store):
+    store.ingest("m1", words("alpha", "beta"))
+    store.ingest("m2", words("gamma", "delta", "epsilon"))
+    store.ingest("m3", words("zeta"))
+    store.add_to_collection("course", ["m1", "m2", "m3"])
+
+    for word in ("alpha", "beta", "gamma", "delta", "epsilon", "zeta"):
+        assert top_chunk(store, "course", word) == words(word)
+
+
+def test_reingested_member_rebuilds_the_index(store):
+    store.ingest("m1", words("alpha"))
+    store.ingest("m2", words("gamma", "delta"))
+    store.add_to_collection("course", ["m1", "m2"])
+    assert top_chunk(store, "course", "delta") == words("delta")
+
+    store.ingest("m2", words("theta", "iota"))
+
+    assert top_chunk(store, "course", "iota") == words("iota")
+    assert words("delta") not in store.retrieve_from_collection("course", "delta", top_k=3)
+    assert top_chunk(store, "course", "alpha") == words("alpha")
+
+
+def test_membership_changes_rebuild_the_index(store):
+    store.ingest("m1", words("alpha"))
+    store.ingest("m2", words("gamma"))
+    store.ingest("m3", words("kappa"))
+    store.add_to_collection("course", ["m1", "m2"])
+    assert top_chunk(store, "course", "alpha") == words("alpha")
+
+    store.remove_from_collection("course", "m1")
+    store.add_to_collection("course", ["m3"])
+
+    found = store.retrieve_from_collection("course", "alpha", top_k=3)
+    assert words("alpha") not in found
+    assert top_chunk(store, "course", "kappa") == words("kappa")
+
+
+def test_members_not_ingested_yet_are_skipped(store):
+    store.ingest("m1", words("alpha", "beta"))
+    store.add_to_collection("course", ["m1", "pending"])
+
+    assert top_chunk(store, "course", "beta") == words("beta")
+    assert list(store.get_collection_term_indexes("course")) == ["m1"]
+
+    store.add_to_collection("empty", ["pending"])
+    with pytest.raises(ValueError):
+        store.retrieve_from_collection("empty", "alpha")
+
+    store.ingest("pending", words("lambda"))
+    assert top_chunk(store, "course", "lambda") == words("lambda")
+
+
+def test_deleted_collection_is_gone(store):
+    store.ingest("m1", words("alpha"))
+    store.add_to_collection("course", ["m1"])
+    store.retrieve_from_collection("course", "alpha")
+
+    store.delete_collection("course")
+
+    assert not store.collection_exists("course")
+    with pytest.raises(ValueError):
+        store.retrieve_from_collection("course", "alpha")
+
+
+def test_material_retrieval_matches_collection_retrieval(store):
+    store.ingest("m1", words("alpha", "beta", "gamma"))
+    store.add_to_collection("course", ["m1"])
+
+    assert store.retrieve("m1", "gamma", top_k=1) == [words("gamma")]
+    assert store.retrieve("m1", "gamma", top_k=1) == store.retrieve_from_collection("course", "gamma", top_k=1)
+
+
+def test_int8_keeps_one_rerank_file_per_material(monkeypatch, tmp_path):
+    monkeypatch.setattr(vector_store_module, "SentenceTransformer", WordEncoder)
+    store = VectorStore(storage_mode="int8", vectors_dir=str(tmp_path))
+    store.chunker = TextChunker(chunk_size=4, overlap=0)
+
+    store.ingest("m1", words("alpha", "beta"))
+    store.ingest("m1", words("gamma", "delta"))
+    store.ingest("m2", words("epsilon"))
+
+    assert len(list(tmp_path.iterdir())) == 2
+    assert store.retrieve("m1", "delta", top_k=1) == [words("delta")]
+
+
+def test_chunk_text_is_stored_once(store):
+    store.ingest("m1", words("alpha", "beta"))
+    data = store.storage["m1"]
+
+    assert data["term_index"].text is data["chunk_text"]
+    assert "chunks" not in data and "full_text" not in data
+    assert store.get_all_chunks("m1") == [words("alpha"), words("beta")]
+
+
+def test_async_ingest_matches_sync_ingest(store):
+    store.scheduler = ModelScheduler(workers=1)
+    store.ingest("m1", words("alpha", "beta", "gamma"))
+
+    async def ingest():
+        with store.scheduler.admit("teacher", BULK):
+            await store.ingest_async("m2", words("alpha", "beta", "gamma"), batch_size=2)
+
+    asyncio.run(ingest())
+
+    assert store.get_all_chunks("m2") == store.get_all_chunks("m1")
+    assert store.retrieve("m2", "beta", top_k=1) == [words("beta")]
+    assert store.get_term_index("m2").terms == store.get_term_index("m1").terms
@@ -1,5 +1,6 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import List, Optional
 import numpy as np
@@ -7,6 +8,13 @@ from sentence_transformers import SentenceTransformer
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 import torch
 import logging
+import asyncio
+import math
+import os
+import time
+
+from semantic_cache import SemanticCache
+from prepease_shared.scheduler import BULK, INTERACTIVE, ModelScheduler, RateLimitedError, SchedulerError, tenant_of
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -32,6 +40,44 @@ qa_model = None
 # In production, use MongoDB or FAISS
 lecture_store = {}
 
+# Semantic answer cache for paraphrased questions (lectureId -> question embeddings + answers)
+answer_cache = SemanticCache(
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+    max_entries=int(os.getenv("SEMANTIC_CACHE_SIZE", "256")),
+)
+
+# Admission control + weighted fair queuing in front of encode/generate calls,
+# so bulk /embed uploads cannot starve interactive /study-buddy questions
+scheduler = ModelScheduler(
+    workers=int(os.getenv("MODEL_WORKERS", "1")),
+    rates={
+        INTERACTIVE: (float(os.getenv("INTERACTIVE_RATE", "10")), float(os.getenv("INTERACTIVE_BURST", "30"))),
+        BULK: (float(os.getenv("BULK_RATE", "2")), float(os.getenv("BULK_BURST", "60"))),
+    },
+)
+EMBED_BATCH_SIZE = 32
+
+async def run_scheduled(fn, *args, cost: float = 1.0, **kwargs):
+    """Run a model call through the scheduler without blocking the event loop"""
+    return await asyncio.wrap_future(scheduler.submit(fn, *args, cost=cost, **kwargs))
+
+def generate_answer(prompt: str) -> str:
+    """Generate an answer with FLAN-T5 (runs on a scheduler worker)"""
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    inputs = qa_tokenizer(prompt, return_tensors="pt", max_length=512, truncation=True).to(device)
+    
+    with torch.no_grad():
+        outputs = qa_model.generate(
+            **inputs,
+            max_length=150,
+            min_length=10,
+            num_beams=4,
+            early_stopping=True,
+            no_repeat_ngram_size=3
+        )
+    
+    return qa_tokenizer.decode(outputs[0], skip_special_tokens=True)
+
 class EmbedRequest(BaseModel):
     lectureId: str
     chunks: List[str]
@@ -67,6 +113,17 @@ async def load_models():
         logger.error(f"Failed to load models: {str(e)}")
         raise
 
+@app.exception_handler(SchedulerError)
+async def scheduler_error_handler(request: Request, exc: SchedulerError):
+    """Reject with 429 when a tenant is over its rate, 503 when queues are full"""
+    if isinstance(exc, RateLimitedError):
+        return JSONResponse(
+            status_code=429,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(math.ceil(exc.retry_after))}
+        )
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -74,11 +131,18 @@ async def health_check():
         "status": "healthy",
         "embedding_model": "loaded" if embedding_model else "not_loaded",
         "qa_model": "loaded" if qa_model else "not_loaded",
-        "lectures_stored": len(lecture_store)
+        "lectures_stored": len(lecture_store),
+        "answer_cache": answer_cache.stats(),
+        "scheduler": scheduler.stats()
     }
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """Semantic answer cache hit-rate and latency savings"""
+    return answer_cache.stats()
+
 @app.post("/embed")
-async def embed_lecture(request: EmbedRequest):
+async def embed_lecture(request: EmbedRequest, http_request: Request):
     """
     Process and store lecture chunks with embeddings
     Called by Node.js after teacher uploads a file
@@ -92,14 +156,23 @@ async def embed_lecture(request: EmbedRequest):
         
         logger.info(f"Embedding {len(request.chunks)} chunks for lecture {request.lectureId}")
         
-        # Generate embeddings for all chunks
-        embeddings = embedding_model.encode(request.chunks, convert_to_numpy=True)
+        # Generate embeddings in small fair-queued batches at bulk priority
+        with scheduler.admit(tenant_of(http_request), BULK):
+            batches = await asyncio.gather(*(
+                run_scheduled(embedding_model.encode, batch, convert_to_numpy=True, cost=len(batch))
+                for batch in (
+                    request.chunks[i:i + EMBED_BATCH_SIZE]
+                    for i in range(0, len(request.chunks), EMBED_BATCH_SIZE)
+                )
+            ))
+        embeddings = np.vstack(batches)
         
         # Store in memory (lectureId -> {chunks, embeddings})
         lecture_store[request.lectureId] = {
             "chunks": request.chunks,
             "embeddings": embeddings
         }
+        answer_cache.invalidate(request.lectureId)
         
         logger.info(f"Successfully embedded lecture {request.lectureId}")
         
@@ -110,12 +183,14 @@ async def embed_lecture(request: EmbedRequest):
             "embedding_dim": embeddings.shape[1]
         }
         
+    except SchedulerError:
+        raise
     except Exception as e:
         logger.error(f"Embedding error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Embedding failed: {str(e)}")
 
 @app.post("/study-buddy", response_model=StudyBuddyResponse)
-async def study_buddy(request: StudyBuddyRequest):
+async def study_buddy(request: StudyBuddyRequest, http_request: Request):
     """
     Main Study Buddy endpoint - answers questions using RAG
     """
@@ -132,38 +207,50 @@ async def study_buddy(request: StudyBuddyRequest):
         
         logger.info(f"Processing question for lecture {request.lectureId}")
         
-        # Retrieve lecture data
+        # Retrieve lecture data (and the cache version it belongs to)
         lecture_data = lecture_store[request.lectureId]
+        cache_version = answer_cache.version(request.lectureId)
         chunks = lecture_data["chunks"]
         chunk_embeddings = lecture_data["embeddings"]
         
-        # Embed the question
-        question_embedding = embedding_model.encode([request.question], convert_to_numpy=True)[0]
-        
-        # Calculate cosine similarity with all chunks
-        similarities = cosine_similarity(question_embedding, chunk_embeddings)
-        
-        # Get top 3 most relevant chunks
-        top_k = min(3, len(chunks))
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
-        relevant_chunks = [chunks[i] for i in top_indices]
-        top_similarities = [similarities[i] for i in top_indices]
-        
-        logger.info(f"Top similarities: {top_similarities}")
-        
-        # Check if the most relevant chunk has sufficient similarity
-        if top_similarities[0] < 0.3:  # Threshold for relevance
-            return StudyBuddyResponse(
-                answer="The uploaded material does not cover this topic.",
-                confidence="low",
-                sources_used=0
-            )
-        
-        # Construct context from relevant chunks
-        context = "\n\n".join(relevant_chunks)
-        
-        # Create RAG prompt with strict instructions
-        prompt = f"""You are a Study Buddy AI.
+        # Admit the question at interactive priority for this tenant
+        with scheduler.admit(tenant_of(http_request), INTERACTIVE):
+            # Embed the question
+            question_embedding = (await run_scheduled(
+                embedding_model.encode, [request.question], convert_to_numpy=True
+            ))[0]
+            
+            # Serve paraphrases of already answered questions from the semantic cache
+            cached = answer_cache.lookup(request.lectureId, question_embedding)
+            if cached is not None:
+                logger.info(f"Semantic cache hit for lecture {request.lectureId}")
+                return StudyBuddyResponse(**cached)
+            started = time.perf_counter()
+            
+            # Calculate cosine similarity with all chunks
+            similarities = cosine_similarity(question_embedding, chunk_embeddings)
+            
+            # Get top 3 most relevant chunks
+            top_k = min(3, len(chunks))
+            top_indices = np.argsort(similarities)[-top_k:][::-1]
+            relevant_chunks = [chunks[i] for i in top_indices]
+            top_similarities = [similarities[i] for i in top_indices]
+            
+            logger.info(f"Top similarities: {top_similarities}")
+            
+            # Check if the most relevant chunk has sufficient similarity
+            if top_similarities[0] < 0.3:  # Threshold for relevance
+                return StudyBuddyResponse(
+                    answer="The uploaded material does not cover this topic.",
+                    confidence="low",
+                    sources_used=0
+                )
+            
+            # Construct context from relevant chunks
+            context = "\n\n".join(relevant_chunks)
+            
+            # Create RAG prompt with strict instructions
+            prompt = f"""You are a Study Buddy AI.
 Answer the question using ONLY the provided lecture content.
 If the answer is not present in the lecture, reply exactly:
 'The uploaded material does not cover this topic.'
@@ -174,41 +261,39 @@ Lecture Content:
 Question: {request.question}
 
 Answer:"""
-        
-        # Generate answer using FLAN-T5
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        inputs = qa_tokenizer(prompt, return_tensors="pt", max_length=512, truncation=True).to(device)
-        
-        with torch.no_grad():
-            outputs = qa_model.generate(
-                **inputs,
-                max_length=150,
-                min_length=10,
-                num_beams=4,
-                early_stopping=True,
-                no_repeat_ngram_size=3
+            
+            # Generate answer using FLAN-T5
+            answer = await run_scheduled(generate_answer, prompt)
+            
+            # Determine confidence based on similarity scores
+            avg_similarity = np.mean(top_similarities)
+            if avg_similarity > 0.6:
+                confidence = "high"
+            elif avg_similarity > 0.4:
+                confidence = "medium"
+            else:
+                confidence = "low"
+            
+            logger.info(f"Generated answer with {confidence} confidence")
+            
+            response = StudyBuddyResponse(
+                answer=answer,
+                confidence=confidence,
+                sources_used=len(relevant_chunks)
             )
+            # Only cache if the lecture was not re-embedded or deleted while we awaited
+            if lecture_store.get(request.lectureId) is lecture_data:
+                answer_cache.store(
+                    request.lectureId,
+                    question_embedding,
+                    response.model_dump(),
+                    (time.perf_counter() - started) * 1000,
+                    version=cache_version
+                )
+            
+            return response
         
-        answer = qa_tokenizer.decode(outputs[0], skip_special_tokens=True)
-        
-        # Determine confidence based on similarity scores
-        avg_similarity = np.mean(top_similarities)
-        if avg_similarity > 0.6:
-            confidence = "high"
-        elif avg_similarity > 0.4:
-            confidence = "medium"
-        else:
-            confidence = "low"
-        
-        logger.info(f"Generated answer with {confidence} confidence")
-        
-        return StudyBuddyResponse(
-            answer=answer,
-            confidence=confidence,
-            sources_used=len(relevant_chunks)
-        )
-        
-    except HTTPException:
+    except (HTTPException, SchedulerError):
         raise
     except Exception as e:
         logger.error(f"Study Buddy error: {str(e)}")
@@ -225,6 +310,7 @@ async def delete_lecture(lectureId: str):
     """Delete lecture embeddings (cleanup)"""
     if lectureId in lecture_store:
         del lecture_store[lectureId]
+        answer_cache.invalidate(lectureId)
         return {"status": "deleted", "lectureId": lectureId}
     else:
         raise HTTPException(status_code=404, detail="Lecture not found")
@@ -0,0 +1,104 @@
+from typing import Optional
+import time
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    Per-lecture cache of answered questions keyed by question embedding.
+    A new question is served from the cache when its cosine similarity to a
+    stored question reaches the threshold. Each lecture keeps at most
+    max_entries questions; the least recently used entry is evicted first.
+
+    Every invalidation bumps the lecture's version. Callers read version()
+    before their awaits and pass it to store(), so answers computed from
+    content that was replaced or deleted meanwhile are dropped.
+    """
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 256):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.lectures = {}
+        self.versions = {}
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+
+    def lookup(self, lecture_id: str, question_embedding: np.ndarray) -> Optional[dict]:
+        """Return the cached response for the closest stored question, if similar enough"""
+        entry = self.lectures.get(lecture_id)
+        if entry is None or entry["size"] == 0:
+            self.misses += 1
+            return None
+
+        query = question_embedding / np.linalg.norm(question_embedding)
+        similarities = entry["embeddings"][:entry["size"]] @ query
+        best = int(np.argmax(similarities))
+
+        if similarities[best] < self.threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.saved_ms += entry["costs_ms"][best]
+        entry["last_used"][best] = time.monotonic()
+        return entry["responses"][best]
+
+    def version(self, lecture_id: str) -> int:
+        """Current content version of a lecture (bumped by invalidate)"""
+        return self.versions.get(lecture_id, 0)
+
+    def store(
+        self,
+        lecture_id: str,
+        question_embedding: np.ndarray,
+        response: dict,
+        cost_ms: float,
+        version: Optional[int] = None,
+    ) -> bool:
+        """
+        Store an answered question, evicting the least recently used one when full.
+        Skipped (returns False) if the lecture changed since `version` was read.
+        """
+        if version is not None and version != self.version(lecture_id):
+            return False
+
+        entry = self.lectures.get(lecture_id)
+        if entry is None:
+            entry = {
+                "embeddings": np.zeros((self.max_entries, question_embedding.shape[0]), dtype=np.float32),
+                "responses": [None] * self.max_entries,
+                "costs_ms": [0.0] * self.max_entries,
+                "last_used": np.zeros(self.max_entries),
+                "size": 0,
+            }
+            self.lectures[lecture_id] = entry
+
+        if entry["size"] < self.max_entries:
+            slot = entry["size"]
+            entry["size"] += 1
+        else:
+            slot = int(np.argmin(entry["last_used"]))
+
+        entry["embeddings"][slot] = question_embedding / np.linalg.norm(question_embedding)
+        entry["responses"][slot] = response
+        entry["costs_ms"][slot] = cost_ms
+        entry["last_used"][slot] = time.monotonic()
+        return True
+
+    def invalidate(self, lecture_id: str):
+        """Drop cached answers for a lecture whose content changed or was deleted"""
+        self.lectures.pop(lecture_id, None)
+        self.versions[lecture_id] = self.version(lecture_id) + 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "latency_saved_ms": round(self.saved_ms, 2),
+            "lectures_cached": len(self.lectures),
+            "entries_cached": sum(entry["size"] for entry in self.lectures.values()),
+        }
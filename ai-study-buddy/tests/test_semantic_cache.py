@@ -0,0 +1,79 @@
+import numpy as np
+
+from semantic_cache import SemanticCache
+
+
+def unit(index, dim=8):
+    vec = np.zeros(dim, dtype=np.float32)
+    vec[index] = 1.0
+    return vec
+
+
+def response(answer):
+    return {"answer": answer, "confidence": "high", "sources_used": 3}
+
+
+def test_paraphrase_above_threshold_is_served():
+    cache = SemanticCache(threshold=0.9, max_entries=4)
+    cache.store("lecture", unit(0), response("cells"), cost_ms=120.0)
+
+    paraphrase = unit(0) + 0.1 * unit(1)
+    assert cache.lookup("lecture", paraphrase) == response("cells")
+    assert cache.lookup("lecture", unit(1)) is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["latency_saved_ms"] == 120.0
+
+
+def test_cache_is_per_lecture():
+    cache = SemanticCache(threshold=0.9)
+    cache.store("a", unit(0), response("a"), cost_ms=1.0)
+
+    assert cache.lookup("b", unit(0)) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticCache(threshold=0.9, max_entries=2)
+    cache.store("lecture", unit(0), response("first"), cost_ms=1.0)
+    cache.store("lecture", unit(1), response("second"), cost_ms=1.0)
+
+    assert cache.lookup("lecture", unit(0)) == response("first")
+    cache.store("lecture", unit(2), response("third"), cost_ms=1.0)
+
+    assert cache.lookup("lecture", unit(1)) is None
+    assert cache.lookup("lecture", unit(0)) == response("first")
+    assert cache.lookup("lecture", unit(2)) == response("third")
+    assert cache.stats()["entries_cached"] == 2
+
+
+def test_invalidate_drops_lecture_answers():
+    cache = SemanticCache(threshold=0.9)
+    cache.store("lecture", unit(0), response("old"), cost_ms=1.0)
+
+    cache.invalidate("lecture")
+
+    assert cache.lookup("lecture", unit(0)) is None
+    assert cache.stats()["lectures_cached"] == 0
+
+
+def test_store_is_dropped_when_lecture_changed_meanwhile():
+    cache = SemanticCache(threshold=0.9)
+    version = cache.version("lecture")
+
+    cache.invalidate("lecture")
+
+    assert cache.store("lecture", unit(0), response("stale"), cost_ms=1.0, version=version) is False
+    assert cache.lookup("lecture", unit(0)) is None
+    assert cache.stats()["lectures_cached"] == 0
+
+
+def test_store_with_current_version_is_kept():
+    cache = SemanticCache(threshold=0.9)
+    cache.invalidate("lecture")
+    version = cache.version("lecture")
+
+    assert cache.store("lecture", unit(0), response("fresh"), cost_ms=1.0, version=version) is True
+    assert cache.lookup("lecture", unit(0)) == response("fresh")
@@ -81,6 +81,7 @@ export const askQuestion = async (req, res) => {
         },
         {
           timeout: 30000, // 30 second timeout
+          headers: { "X-Tenant-Id": userId.toString() },
         }
       );
 
@@ -132,7 +132,7 @@ async function processPDFAsync(material) {
     // Step 2: Send to AI service (non-critical)
     try {
       console.log(`[AI] Ingesting material: ${material._id}`);
-      await ingestMaterialToAI(material._id, extractedText);
+      await ingestMaterialToAI(material._id, extractedText, material.uploadedBy);
       
       material.aiStatus = "processed";
       await material.save();
@@ -140,7 +140,7 @@ async function processPDFAsync(material) {
       console.log(`[AI] Material ${material._id} processed successfully`);
       
       // Step 3: Process for Study Buddy (RAG)
-      await processForStudyBuddy(material._id, material.filePath);
+      await processForStudyBuddy(material._id, material.filePath, material.uploadedBy);
       
     } catch (aiError) {
       // AI failure should not affect upload success
@@ -164,8 +164,9 @@ async function processPDFAsync(material) {
  * Directly calls Python AI service to process lecture content
  * @param {String} materialId - Material ID
  * @param {String} filePath - File path
+ * @param {String} tenantId - Uploader ID, used by the AI service for rate limiting
  */
-async function processForStudyBuddy(materialId, filePath) {
+async function processForStudyBuddy(materialId, filePath, tenantId) {
   try {
     console.log(`[Study Buddy] Processing material ${materialId} for RAG`);
     
@@ -191,7 +192,8 @@ async function processForStudyBuddy(materialId, filePath) {
     }, {
       timeout: 120000, // 2 minutes
       headers: {
-        'Content-Type': 'application/json'
+        'Content-Type': 'application/json',
+        'X-Tenant-Id': String(tenantId)
       }
     });
     
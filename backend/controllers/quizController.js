@@ -82,6 +82,7 @@ export const generateQuiz = async (req, res) => {
         },
         {
           timeout: 60000, // 60 second timeout for quiz generation
+          headers: { "X-Tenant-Id": userId.toString() },
         }
       );
 
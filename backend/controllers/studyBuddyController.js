@@ -10,6 +10,7 @@ const AI_SERVICE_URL = process.env.AI_SERVICE_URL || 'http://localhost:8000';
 async function processLectureUpload(req, res) {
   try {
     const { lectureId, filePath } = req.body;
+    const userId = req.user?._id; // From auth middleware
     
     if (!lectureId || !filePath) {
       return res.status(400).json({ 
@@ -60,7 +61,8 @@ async function processLectureUpload(req, res) {
         {
           timeout: 120000, // 2 minutes for large files
           headers: {
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            'X-Tenant-Id': String(userId)
           }
         }
       );
@@ -142,7 +144,8 @@ async function studyBuddyChat(req, res) {
         {
           timeout: 30000, // 30 seconds
           headers: {
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            'X-Tenant-Id': String(userId)
           }
         }
       );
@@ -27,9 +27,10 @@ export const extractPDFText = async (filePath) => {
  * Send extracted text to AI microservice for ingestion
  * @param {string} materialId - MongoDB material ID
  * @param {string} extractedText - Extracted text content
+ * @param {string} [tenantId] - Uploader ID, used by the AI service for rate limiting
  * @returns {Promise<Object>} - AI service response
  */
-export const ingestMaterialToAI = async (materialId, extractedText) => {
+export const ingestMaterialToAI = async (materialId, extractedText, tenantId) => {
   try {
     const response = await axios.post(
       `${AI_SERVICE_URL}/ingest`,
@@ -39,6 +40,7 @@ export const ingestMaterialToAI = async (materialId, extractedText) => {
       },
       {
         timeout: 30000, // 30 second timeout
+        headers: tenantId ? { "X-Tenant-Id": tenantId.toString() } : {},
       }
     );
 
@@ -0,0 +1,311 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+_current_class: ContextVar[str] = ContextVar("priority_class", default=INTERACTIVE)
+_current_tenant: ContextVar[str] = ContextVar("tenant", default="anonymous")
+_in_job: ContextVar[bool] = ContextVar("in_job", default=False)
+
+
+class SchedulerError(Exception):
+    pass
+
+
+class RateLimitedError(SchedulerError):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limit exceeded, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class OverloadedError(SchedulerError):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, cost: float = 1.0) -> float:
+        """
+        Take tokens if available. Returns 0 on success, otherwise seconds until enough refill.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def is_full(self, now: float) -> bool:
+        """
+        Whether the bucket has refilled to its burst, i.e. is indistinguishable from a new one.
+        """
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+def tenant_of(request) -> str:
+    """
+    Rate-limit key for a Starlette request: the X-Tenant-Id header sent by the
+    backend, else the client IP.
+    """
+    if request.headers.get("X-Tenant-Id"):
+        return request.headers["X-Tenant-Id"]
+    return request.client.host if request.client else "anonymous"
+
+
+class ModelScheduler:
+    """
+    Admission control and weighted fair queuing in front of model calls.
+
+    Requests are admitted per tenant and priority class through token buckets.
+    Admitted model calls are queued per (class, tenant) flow and dispatched to a
+    fixed pool of worker threads in start-time fair queuing order, so each class
+    gets CPU in proportion to its weight and tenants within a class share evenly.
+    Bulk work should be submitted in small batches so interactive calls never
+    wait behind more than one batch per worker.
+
+    Jobs run in a copy of the submitter's context, with each of job_hooks (context
+    manager factories, e.g. a profiler attaching the worker thread) entered around them.
+    Async callers await run_async / map_batches_async, which hold no thread while queued.
+
+    Per-tenant state is dropped once it carries no information: every sweep_interval
+    seconds, buckets that have refilled to burst and flows whose last finish tag is
+    behind the virtual time are evicted, and all flows are reset when the scheduler idles.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        weights: Optional[Dict[str, float]] = None,
+        rates: Optional[Dict[str, Tuple[float, float]]] = None,
+        max_queued: Optional[Dict[str, int]] = None,
+        job_hooks: Optional[List[Callable]] = None,
+        sweep_interval: float = 60.0,
+    ):
+        self.weights = weights or {INTERACTIVE: 16.0, BULK: 1.0}
+        self.rates = rates or {INTERACTIVE: (10.0, 30.0), BULK: (2.0, 60.0)}
+        self.max_queued = max_queued or {INTERACTIVE: 256, BULK: 1024}
+        self.job_hooks = job_hooks or []
+        self.sweep_interval = sweep_interval
+
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._queue: List = []
+        self._queued: Dict[str, int] = {name: 0 for name in self.weights}
+        self._last_finish: Dict[Tuple[str, str], float] = {}
+        self._virtual_time = 0.0
+        self._running = 0
+        self._swept_at = time.monotonic()
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._stats = {
+            name: {"completed": 0, "rate_limited": 0, "overloaded": 0, "wait_ms": 0.0}
+            for name in self.weights
+        }
+
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"model-scheduler-{i}", daemon=True).start()
+
+    @contextmanager
+    def admit(self, tenant: str, priority_class: str = INTERACTIVE, cost: float = 1.0):
+        """
+        Charge the tenant's token bucket for this request and tag model calls
+        made inside the block with its tenant and priority class.
+        Raises RateLimitedError when the bucket is empty.
+        """
+        if priority_class not in self.weights:
+            raise ValueError(f"Unknown priority class: {priority_class}")
+
+        with self._condition:
+            self._sweep()
+            key = (priority_class, tenant)
+            if key not in self._buckets:
+                self._buckets[key] = TokenBucket(*self.rates[priority_class])
+            retry_after = self._buckets[key].take(cost)
+            if retry_after:
+                self._stats[priority_class]["rate_limited"] += 1
+                raise RateLimitedError(retry_after)
+
+        class_token = _current_class.set(priority_class)
+        tenant_token = _current_tenant.set(tenant)
+        try:
+            yield
+        finally:
+            _current_class.reset(class_token)
+            _current_tenant.reset(tenant_token)
+
+    def submit(self, fn: Callable, *args, cost: float = 1.0, **kwargs) -> Future:
+        """
+        Queue a model call under the current tenant and priority class.
+        Raises OverloadedError when the class queue is full.
+        """
+        priority_class = _current_class.get()
+
+        with self._condition:
+            self._reserve(priority_class, 1)
+            future = self._enqueue(fn, args, kwargs, cost, priority_class, contextvars.copy_context())
+            self._condition.notify()
+
+        return future
+
+    def run(self, fn: Callable, *args, cost: float = 1.0, **kwargs):
+        """
+        Submit a model call and block until it completes.
+        """
+        return self.submit(fn, *args, cost=cost, **kwargs).result()
+
+    async def run_async(self, fn: Callable, *args, cost: float = 1.0, **kwargs):
+        """
+        Submit a model call and await it without blocking the event loop.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, cost=cost, **kwargs))
+
+    def map_batches(self, fn: Callable, items: List, batch_size: int) -> List:
+        """
+        Submit fn over items in batches (each its own fair-queued job) and
+        return the per-batch results in order.
+
+        Queue capacity is checked for all batches at once, so OverloadedError is
+        raised before any batch is queued; if a batch fails, the batches still
+        queued are cancelled. Called from inside a job, the batches run inline on
+        that worker, since waiting on queued jobs there could deadlock the pool.
+        """
+        if _in_job.get():
+            return [fn(items[i:i + batch_size]) for i in range(0, len(items), batch_size)]
+
+        futures = self._submit_batches(fn, items, batch_size)
+        try:
+            return [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    async def map_batches_async(self, fn: Callable, items: List, batch_size: int) -> List:
+        """
+        map_batches for async callers: awaits the batches without holding a thread.
+        """
+        futures = self._submit_batches(fn, items, batch_size)
+        try:
+            return await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    def stats(self) -> Dict:
+        with self._condition:
+            return {
+                name: {
+                    "queued": self._queued[name],
+                    "completed": stats["completed"],
+                    "rate_limited": stats["rate_limited"],
+                    "overloaded": stats["overloaded"],
+                    "avg_wait_ms": stats["wait_ms"] / stats["completed"] if stats["completed"] else 0.0,
+                }
+                for name, stats in self._stats.items()
+            }
+
+    def _submit_batches(self, fn: Callable, items: List, batch_size: int) -> List[Future]:
+        """
+        Queue every batch of items under one lock, or none if the class queue lacks room.
+        """
+        priority_class = _current_class.get()
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        context = contextvars.copy_context()
+
+        with self._condition:
+            self._reserve(priority_class, len(batches))
+            futures = [
+                self._enqueue(fn, (batch,), {}, len(batch), priority_class, context.copy())
+                for batch in batches
+            ]
+            self._condition.notify_all()
+        return futures
+
+    def _reserve(self, priority_class: str, jobs: int) -> None:
+        """
+        Raise OverloadedError unless the class queue has room for jobs more. Caller holds the lock.
+        """
+        if self._queued[priority_class] + jobs > self.max_queued[priority_class]:
+            self._stats[priority_class]["overloaded"] += 1
+            raise OverloadedError(f"Too many queued {priority_class} requests")
+
+    def _enqueue(self, fn, args, kwargs, cost, priority_class, context) -> Future:
+        """
+        Tag a job with its flow's start/finish times and push it. Caller holds the lock.
+        """
+        flow = (priority_class, context.get(_current_tenant, "anonymous"))
+        future: Future = Future()
+
+        start = max(self._virtual_time, self._last_finish.get(flow, 0.0))
+        finish = start + cost / self.weights[priority_class]
+        self._last_finish[flow] = finish
+        self._queued[priority_class] += 1
+
+        job = (fn, args, kwargs, future, context, priority_class, start, time.perf_counter())
+        heapq.heappush(self._queue, (finish, next(self._sequence), job))
+        return future
+
+    def _sweep(self) -> None:
+        """
+        Evict buckets that have refilled and flows no longer ahead of the virtual
+        time; both would be recreated identically. Caller holds the lock.
+        """
+        now = time.monotonic()
+        if now - self._swept_at < self.sweep_interval:
+            return
+        self._swept_at = now
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if not bucket.is_full(now)}
+        self._last_finish = {
+            flow: finish for flow, finish in self._last_finish.items() if finish > self._virtual_time
+        }
+
+    def _worker(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                _, _, job = heapq.heappop(self._queue)
+                fn, args, kwargs, future, context, priority_class, start, queued_at = job
+                self._virtual_time = max(self._virtual_time, start)
+                self._queued[priority_class] -= 1
+                self._running += 1
+                self._stats[priority_class]["wait_ms"] += (time.perf_counter() - queued_at) * 1000
+                self._stats[priority_class]["completed"] += 1
+                self._sweep()
+
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(context.run(self._run_job, fn, args, kwargs))
+                except BaseException as exc:
+                    future.set_exception(exc)
+
+            with self._condition:
+                self._running -= 1
+                if not self._queue and not self._running and self._last_finish:
+                    # Idle: virtual time catches up with every flow, so no flow keeps a head start or debt
+                    self._virtual_time = max(self._virtual_time, max(self._last_finish.values()))
+                    self._last_finish.clear()
+
+    def _run_job(self, fn: Callable, args, kwargs):
+        _in_job.set(True)
+        with ExitStack() as stack:
+            for hook in self.job_hooks:
+                stack.enter_context(hook())
+            return fn(*args, **kwargs)
@@ -0,0 +1,176 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from prepease_shared.scheduler import BULK, INTERACTIVE, ModelScheduler, OverloadedError, RateLimitedError
+
+
+def test_interactive_jobs_overtake_queued_bulk_jobs():
+    scheduler = ModelScheduler(workers=1, rates={INTERACTIVE: (100.0, 100.0), BULK: (100.0, 100.0)})
+    release = threading.Event()
+    order = []
+
+    blocker = scheduler.submit(release.wait)
+
+    with scheduler.admit("teacher", BULK):
+        bulk = [scheduler.submit(order.append, f"bulk-{i}") for i in range(5)]
+    with scheduler.admit("student", INTERACTIVE):
+        interactive = [scheduler.submit(order.append, f"interactive-{i}") for i in range(2)]
+
+    release.set()
+    for future in [blocker] + bulk + interactive:
+        future.result(timeout=5)
+
+    assert order[:2] == ["interactive-0", "interactive-1"]
+    assert order[2:] == [f"bulk-{i}" for i in range(5)]
+
+
+def test_tenants_share_a_class_evenly():
+    scheduler = ModelScheduler(workers=1, rates={INTERACTIVE: (100.0, 100.0), BULK: (100.0, 100.0)})
+    release = threading.Event()
+    order = []
+
+    blocker = scheduler.submit(release.wait)
+    futures = []
+    for tenant in ("a", "b"):
+        with scheduler.admit(tenant, BULK):
+            futures += [scheduler.submit(order.append, tenant) for _ in range(3)]
+
+    release.set()
+    for future in [blocker] + futures:
+        future.result(timeout=5)
+
+    assert order == ["a", "b", "a", "b", "a", "b"]
+
+
+def test_rate_limit_is_per_tenant_and_class():
+    scheduler = ModelScheduler(workers=1, rates={INTERACTIVE: (1.0, 2.0), BULK: (1.0, 1.0)})
+
+    for _ in range(2):
+        with scheduler.admit("student", INTERACTIVE):
+            pass
+
+    with pytest.raises(RateLimitedError) as excinfo:
+        with scheduler.admit("student", INTERACTIVE):
+            pass
+
+    assert 0 < excinfo.value.retry_after <= 1.0
+    assert scheduler.stats()[INTERACTIVE]["rate_limited"] == 1
+
+    with scheduler.admit("other-student", INTERACTIVE):
+        pass
+    with scheduler.admit("student", BULK):
+        pass
+
+
+def test_map_batches_returns_results_in_order():
+    scheduler = ModelScheduler(workers=2)
+
+    with scheduler.admit("teacher", BULK):
+        results = scheduler.map_batches(lambda batch: [x * 2 for x in batch], list(range(7)), 3)
+
+    assert results == [[0, 2, 4], [6, 8, 10], [12]]
+
+
+def test_map_batches_checks_capacity_before_queueing_any_batch():
+    scheduler = ModelScheduler(workers=1, max_queued={INTERACTIVE: 8, BULK: 3})
+    release = threading.Event()
+    calls = []
+
+    blocker = scheduler.submit(release.wait)
+    with scheduler.admit("teacher", BULK):
+        with pytest.raises(OverloadedError):
+            scheduler.map_batches(calls.append, list(range(10)), 3)
+
+    assert scheduler.stats()[BULK]["queued"] == 0
+    release.set()
+    blocker.result(timeout=5)
+    assert calls == []
+
+
+def test_map_batches_cancels_queued_batches_when_one_fails():
+    scheduler = ModelScheduler(workers=1)
+    release = threading.Event()
+    calls = []
+
+    def encode(batch):
+        calls.append(batch)
+        # Hold the worker with an interactive job so the remaining batches are still queued
+        with scheduler.admit("student", INTERACTIVE):
+            scheduler.submit(release.wait)
+        raise RuntimeError("model failed")
+
+    with scheduler.admit("teacher", BULK):
+        with pytest.raises(RuntimeError):
+            scheduler.map_batches(encode, list(range(9)), 3)
+
+    release.set()
+    time.sleep(0.05)
+    assert calls == [[0, 1, 2]]
+    assert scheduler.stats()[BULK]["queued"] == 0
+
+
+def test_idle_tenant_state_is_evicted():
+    scheduler = ModelScheduler(workers=1, rates={INTERACTIVE: (1000.0, 1.0), BULK: (1000.0, 1.0)}, sweep_interval=0)
+
+    for tenant in ("a", "b", "c"):
+        with scheduler.admit(tenant, BULK):
+            scheduler.run(lambda: None)
+
+    time.sleep(0.01)
+    with scheduler.admit("d", INTERACTIVE):
+        pass
+
+    assert list(scheduler._buckets) == [(INTERACTIVE, "d")]
+    assert scheduler._last_finish == {}
+
+
+def test_flows_behind_the_virtual_time_are_evicted_under_load():
+    scheduler = ModelScheduler(workers=1, rates={INTERACTIVE: (100.0, 100.0), BULK: (100.0, 100.0)}, sweep_interval=0)
+    release = threading.Event()
+    hold = threading.Event()
+
+    blocker = scheduler.submit(release.wait)
+    with scheduler.admit("old", BULK):
+        scheduler.submit(lambda: None)
+    with scheduler.admit("busy", BULK):
+        busy = [scheduler.submit(lambda: None), scheduler.submit(lambda: None), scheduler.submit(hold.wait)]
+
+    release.set()
+    blocker.result(timeout=5)
+    while scheduler.stats()[BULK]["queued"]:
+        time.sleep(0.001)
+
+    # The last busy job is still running, so the scheduler has not gone idle
+    assert (BULK, "old") not in scheduler._last_finish
+    assert (BULK, "busy") in scheduler._last_finish
+    hold.set()
+    busy[-1].result(timeout=5)
+
+
+def test_async_callers_await_jobs_without_holding_a_thread():
+    scheduler = ModelScheduler(workers=1, rates={INTERACTIVE: (100.0, 100.0), BULK: (100.0, 100.0)})
+
+    async def handlers():
+        with scheduler.admit("teacher", BULK):
+            ingest = asyncio.ensure_future(
+                scheduler.map_batches_async(lambda batch: [x * 2 for x in batch], list(range(7)), 3)
+            )
+        with scheduler.admit("student", INTERACTIVE):
+            answer = await scheduler.run_async(lambda: threading.current_thread().name)
+        return await ingest, answer
+
+    assert asyncio.run(handlers()) == ([[0, 2, 4], [6, 8, 10], [12]], "model-scheduler-0")
+
+
+def test_map_batches_inside_a_job_runs_inline():
+    scheduler = ModelScheduler(workers=1)
+
+    def job():
+        return scheduler.map_batches(lambda batch: sum(batch), list(range(6)), 2)
+
+    with scheduler.admit("teacher", BULK):
+        assert scheduler.run(job) == [1, 5, 9]
+    assert scheduler.stats()[BULK]["completed"] == 1